@@ -0,0 +1,62 @@
+"""notes archive table and partial live-note indexes
+
+Revision ID: 3f1c2a9b7d40
+Revises: ad39e01c5bd1
+Create Date: 2026-10-19 09:12:03.184522
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from typing import Sequence, Union
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c2a9b7d40'
+down_revision: Union[str, Sequence[str], None] = 'ad39e01c5bd1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('notes_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('title', sqlmodel.sql.sqltypes.AutoString(length=100), nullable=False),
+    sa.Column('content', sqlmodel.sql.sqltypes.AutoString(length=5000), nullable=False),
+    sa.Column('tag', sa.JSON(), nullable=True),
+    sa.Column('is_public', sa.Boolean(), nullable=False),
+    sa.Column('is_pinned', sa.Boolean(), server_default='0', nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('deleted_at', sa.DateTime(), nullable=False),
+    sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_notes_archive_archived_at'), 'notes_archive', ['archived_at'], unique=False)
+
+    op.create_index('ix_notes_live_title', 'notes', ['title'], unique=False,
+                    postgresql_where=sa.text('deleted_at IS NULL'))
+    op.create_index('ix_notes_live_is_public', 'notes', ['is_public'], unique=False,
+                    postgresql_where=sa.text('deleted_at IS NULL'))
+    op.create_index('ix_notes_live_is_pinned', 'notes', ['is_pinned'], unique=False,
+                    postgresql_where=sa.text('deleted_at IS NULL'))
+    op.create_index('ix_notes_deleted_at', 'notes', ['deleted_at'], unique=False,
+                    postgresql_where=sa.text('deleted_at IS NOT NULL'))
+
+    # Superseded by the partial indexes above; keeping both doubles index
+    # maintenance on every write for no query that needs the full ones.
+    op.drop_index(op.f('ix_notes_title'), table_name='notes')
+    op.drop_index(op.f('ix_notes_is_public'), table_name='notes')
+    op.drop_index(op.f('ix_notes_is_pinned'), table_name='notes')
+
+
+def downgrade() -> None:
+    op.create_index(op.f('ix_notes_is_pinned'), 'notes', ['is_pinned'], unique=False)
+    op.create_index(op.f('ix_notes_is_public'), 'notes', ['is_public'], unique=False)
+    op.create_index(op.f('ix_notes_title'), 'notes', ['title'], unique=False)
+    op.drop_index('ix_notes_deleted_at', table_name='notes')
+    op.drop_index('ix_notes_live_is_pinned', table_name='notes')
+    op.drop_index('ix_notes_live_is_public', table_name='notes')
+    op.drop_index('ix_notes_live_title', table_name='notes')
+    op.drop_index(op.f('ix_notes_archive_archived_at'), table_name='notes_archive')
+    op.drop_table('notes_archive')
@@ -0,0 +1,32 @@
+"""gin index for tag containment filter
+
+Revision ID: 8b5e0d6c41a2
+Revises: 3f1c2a9b7d40
+Create Date: 2026-10-19 10:02:47.513208
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from typing import Sequence, Union
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b5e0d6c41a2'
+down_revision: Union[str, Sequence[str], None] = '3f1c2a9b7d40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # get_all_notes/count_notes(tags=...) filter with CAST(tag AS JSONB) @> '["x"]'.
+    # explain-plans at 100k rows (each tag on 2% of notes): without this index
+    # the exact tag count is a full seq scan (cost ~5.9k vs ~4.9k) and live
+    # tag+pinned pages cost ~2k vs ~1.1k; plain tag pages scan under LIMIT
+    # either way. The gap widens as tags get rarer and the table grows.
+    op.create_index('ix_notes_tag_gin', 'notes',
+                    [sa.text('(CAST(tag AS JSONB)) jsonb_path_ops')],
+                    unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_notes_tag_gin', table_name='notes')
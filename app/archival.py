@@ -0,0 +1,97 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, insert, select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.database import AsyncSessionLocal
+from app.config.settings import (
+    ARCHIVE_BATCH_SIZE,
+    ARCHIVE_INTERVAL_SECONDS,
+    ARCHIVE_RETENTION_DAYS,
+)
+from app.middleware import logger
+from app.models import Notes, NotesArchive
+
+ARCHIVED_COLUMNS = [
+    "id", "title", "content", "tag", "is_public", "is_pinned",
+    "created_at", "updated_at", "deleted_at",
+]
+
+
+def _archive_batch_statement(cutoff: datetime, batch_size: int):
+    """
+    One bounded move: DELETE up to `batch_size` expired rows from notes and
+    INSERT them into notes_archive in the same statement.
+    SKIP LOCKED lets several replicas run the job without blocking each other.
+    """
+    notes = Notes.__table__
+    expired_ids = (
+        select(notes.c.id)
+        .where(notes.c.deleted_at.is_not(None), notes.c.deleted_at < cutoff)
+        .order_by(notes.c.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    moved = (
+        delete(notes)
+        .where(notes.c.id.in_(expired_ids.scalar_subquery()))
+        .returning(*[notes.c[name] for name in ARCHIVED_COLUMNS])
+        .cte("moved")
+    )
+    return insert(NotesArchive.__table__).from_select(
+        ARCHIVED_COLUMNS + ["archived_at"],
+        select(*[moved.c[name] for name in ARCHIVED_COLUMNS], func.now()),
+    )
+
+
+async def archive_deleted_notes(
+    session: AsyncSession,
+    retention_days: int = ARCHIVE_RETENTION_DAYS,
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+    max_batches: int | None = None,
+) -> int:
+    """
+    Move notes soft-deleted more than `retention_days` ago into notes_archive.
+    Each batch is its own short transaction, so locks and WAL stay bounded.
+    Returns the number of notes archived.
+    """
+    cutoff = datetime.now() - timedelta(days=retention_days)
+    archived = 0
+    batches = 0
+
+    while max_batches is None or batches < max_batches:
+        try:
+            result = await session.execute(_archive_batch_statement(cutoff, batch_size))
+            await session.commit()
+        except Exception as e:
+            await session.rollback()
+            logger.error(f"[archive] Batch failed after {archived} notes: {str(e)}", exc_info=True)
+            raise
+
+        moved = result.rowcount or 0
+        archived += moved
+        batches += 1
+        logger.debug(f"[archive] Batch {batches} moved {moved} notes")
+        if moved < batch_size:
+            break
+
+    logger.info(
+        f"[archive] Archived {archived} notes soft-deleted before {cutoff.isoformat()} "
+        f"in {batches} batch(es)"
+    )
+    return archived
+
+
+async def run_periodic_archival(interval: int = ARCHIVE_INTERVAL_SECONDS) -> None:
+    """Background loop started from the app lifespan; errors never stop the loop."""
+    logger.info(f"[archive] Periodic archival every {interval}s")
+    while True:
+        try:
+            async with AsyncSessionLocal() as session:
+                await archive_deleted_notes(session)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"[archive] Periodic archival failed: {str(e)}")
+        await asyncio.sleep(interval)
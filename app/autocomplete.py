@@ -0,0 +1,105 @@
+"""
+Title and tag typeahead backed by Redis sorted sets.
+
+Every member has score 0, so ZRANGEBYLEX walks them in byte order of the
+normalised text and a prefix lookup is one O(log n + limit) command:
+
+    ac:titles  "<normalised title>\\x00<title>\\x00<id>"   (live notes only)
+    ac:tags    "<normalised tag>\\x00<tag>"                (tags on >= 1 live note)
+
+NoteService keeps both sets in step on every write; rebuild_autocomplete()
+recreates them from Postgres. Dropping a tag relies on the facet counters, so
+NoteService.rebuild_facets() (run when they are missing) also resets ac:tags.
+"""
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.database import redis_bytes_client
+from app.middleware import logger
+from app.models import Notes
+
+TITLES_KEY = "ac:titles"
+TAGS_KEY = "ac:tags"
+SEPARATOR = "\x00"
+REBUILD_CHUNK = 1000
+
+
+def normalise(text: str) -> str:
+    """Case-insensitive, whitespace-collapsed form used for prefix matching."""
+    return " ".join(text.casefold().split())
+
+
+def title_member(note_id: int, title: str) -> str:
+    return f"{normalise(title)}{SEPARATOR}{title}{SEPARATOR}{note_id}"
+
+
+def tag_member(tag: str) -> str:
+    return f"{normalise(tag)}{SEPARATOR}{tag}"
+
+
+def _prefix_range(prefix: str) -> tuple[bytes, bytes]:
+    # 0xff never occurs in UTF-8, so it bounds every member starting with prefix
+    encoded = normalise(prefix).encode("utf-8")
+    return b"[" + encoded, b"[" + encoded + b"\xff"
+
+
+async def suggest(prefix: str, limit: int = 10, kinds: tuple[str, ...] = ("title", "tag")) -> dict:
+    """Prefix-match titles and/or tags in a single pipelined round trip."""
+    low, high = _prefix_range(prefix)
+    pipe = redis_bytes_client.pipeline(transaction=False)
+    if "title" in kinds:
+        pipe.zrangebylex(TITLES_KEY, low, high, start=0, num=limit)
+    if "tag" in kinds:
+        pipe.zrangebylex(TAGS_KEY, low, high, start=0, num=limit)
+    results = iter(await pipe.execute())
+
+    suggestions = {}
+    if "title" in kinds:
+        titles = []
+        for raw in next(results):
+            parts = raw.decode("utf-8").split(SEPARATOR)
+            titles.append({"id": int(parts[-1]), "title": SEPARATOR.join(parts[1:-1])})
+        suggestions["titles"] = titles
+    if "tag" in kinds:
+        suggestions["tags"] = [raw.decode("utf-8").split(SEPARATOR, 1)[1] for raw in next(results)]
+    return suggestions
+
+
+async def rebuild_autocomplete(session: AsyncSession) -> dict:
+    """
+    Recreate both sets from live notes in Postgres, streaming rows in chunks
+    into temporary keys that are renamed over the live ones at the end.
+    """
+    tmp_titles, tmp_tags = f"{TITLES_KEY}:rebuild", f"{TAGS_KEY}:rebuild"
+    await redis_bytes_client.delete(tmp_titles, tmp_tags)
+
+    statement = (
+        select(Notes.id, Notes.title, Notes.tag)
+        .where(Notes.deleted_at.is_(None))
+        .execution_options(yield_per=REBUILD_CHUNK)
+    )
+    titles = 0
+    tags = set()
+    result = await session.stream(statement)
+    async for chunk in result.partitions():
+        await redis_bytes_client.zadd(
+            tmp_titles, {title_member(note_id, title): 0 for note_id, title, _ in chunk}
+        )
+        titles += len(chunk)
+        for _, _, note_tags in chunk:
+            if isinstance(note_tags, list):
+                tags.update(note_tags)
+
+    if tags:
+        await redis_bytes_client.zadd(tmp_tags, {tag_member(tag): 0 for tag in tags})
+
+    pipe = redis_bytes_client.pipeline(transaction=True)
+    pipe.delete(TITLES_KEY, TAGS_KEY)
+    if titles:
+        pipe.rename(tmp_titles, TITLES_KEY)
+    if tags:
+        pipe.rename(tmp_tags, TAGS_KEY)
+    await pipe.execute()
+
+    logger.info(f"[autocomplete] Rebuilt index: {titles} titles, {len(tags)} tags")
+    return {"titles": titles, "tags": len(tags)}
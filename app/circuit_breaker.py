@@ -0,0 +1,132 @@
+import asyncio
+import time
+from collections import Counter
+
+from redis.exceptions import ConnectionError as RedisConnectionError
+from redis.exceptions import RedisError, TimeoutError as RedisTimeoutError
+
+from app.middleware import logger
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+# Errors that mean "Redis is unavailable"; anything else (e.g. WRONGTYPE) is an answer.
+AVAILABILITY_ERRORS = (RedisConnectionError, RedisTimeoutError, asyncio.TimeoutError, OSError)
+
+
+class CircuitOpenError(RedisError):
+    """Raised instead of calling Redis while the breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    closed    -> calls go through; `failure_threshold` availability errors in a row open it
+    open      -> calls fail immediately with CircuitOpenError for `reset_timeout` seconds
+    half_open -> a single probe call is let through; success closes, failure re-opens
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 5.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self.transitions = Counter()
+        self.rejected = 0
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "transitions": dict(self.transitions),
+            "rejected_calls": self.rejected,
+        }
+
+    def _transition(self, state: str) -> None:
+        if state == self.state:
+            return
+        previous, self.state = self.state, state
+        self.transitions[state] += 1
+        log = logger.warning if state == OPEN else logger.info
+        log(f"[breaker:{self.name}] {previous} -> {state} (failures={self.consecutive_failures})")
+
+    def _before_call(self) -> bool:
+        """Return True if this call is the half-open probe; raise if it must be rejected."""
+        if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self._transition(HALF_OPEN)
+        if self.state == CLOSED:
+            return False
+        if self.state == HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        self.rejected += 1
+        raise CircuitOpenError(f"Circuit '{self.name}' is {self.state}")
+
+    def _on_success(self) -> None:
+        self.consecutive_failures = 0
+        self._transition(CLOSED)
+
+    def _on_failure(self) -> None:
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            self._transition(OPEN)
+
+    async def call(self, fn, *args, **kwargs):
+        is_probe = self._before_call()
+        try:
+            result = await fn(*args, **kwargs)
+        except AVAILABILITY_ERRORS:
+            self._on_failure()
+            raise
+        except RedisError:
+            self._on_success()
+            raise
+        finally:
+            if is_probe:
+                self._probe_in_flight = False
+        self._on_success()
+        return result
+
+
+class _GuardedPipeline:
+    """Queues commands on the real pipeline; only `execute` goes through the breaker."""
+
+    def __init__(self, pipeline, breaker: CircuitBreaker):
+        self._pipeline = pipeline
+        self._breaker = breaker
+
+    def __getattr__(self, name):
+        return getattr(self._pipeline, name)
+
+    async def execute(self, *args, **kwargs):
+        return await self._breaker.call(self._pipeline.execute, *args, **kwargs)
+
+
+class BreakerRedis:
+    """
+    Drop-in proxy for a redis.asyncio client that routes every command
+    through a CircuitBreaker, so an unavailable Redis costs nothing once open.
+    """
+
+    PASSTHROUGH = {"close", "aclose", "connection_pool"}
+
+    def __init__(self, client, breaker: CircuitBreaker):
+        self._client = client
+        self.breaker = breaker
+
+    def pipeline(self, *args, **kwargs) -> _GuardedPipeline:
+        return _GuardedPipeline(self._client.pipeline(*args, **kwargs), self.breaker)
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if name in self.PASSTHROUGH or not callable(attr):
+            return attr
+
+        async def guarded(*args, **kwargs):
+            return await self.breaker.call(attr, *args, **kwargs)
+
+        return guarded
@@ -0,0 +1,128 @@
+"""
+Maintenance commands for the Notes API.
+
+Usage:
+    python -m app.cli rebuild-facets
+    python -m app.cli rebuild-autocomplete
+    python -m app.cli archive-deleted [--retention-days N] [--batch-size N] [--max-batches N]
+    python -m app.cli explain-plans [--database-url URL] [--rows N]
+    python -m app.cli warm-cache
+    python -m app.cli profile-report FILE [--top N] [--sort tottime|cumulative|calls]
+"""
+import argparse
+import asyncio
+import json
+import pstats
+import sys
+
+from app.config.database import AsyncSessionLocal, engine, redis_client, redis_bytes_client
+from app.config.logging import setup_logger
+from app.config.settings import ARCHIVE_BATCH_SIZE, ARCHIVE_RETENTION_DAYS, PROFILE_TOP_N, TEST_DATABASE_URL
+from app.archival import archive_deleted_notes
+from app.profiling import format_summary
+from app.query_plans import CALIBRATED_ROWS, format_reports, run_plan_checks
+from app.warmup import run_warmup
+from app.service import NoteService
+
+
+# Full-table rebuilds may legitimately outlast the request statement_timeout
+MAINTENANCE_SESSION_INFO = {"statement_timeout_ms": 0}
+
+
+async def rebuild_facets(args: argparse.Namespace) -> None:
+    async with AsyncSessionLocal(info=MAINTENANCE_SESSION_INFO) as session:
+        facets = await NoteService(session).rebuild_facets()
+    print(json.dumps(facets, indent=2))
+
+
+async def rebuild_autocomplete(args: argparse.Namespace) -> None:
+    async with AsyncSessionLocal(info=MAINTENANCE_SESSION_INFO) as session:
+        counts = await NoteService(session).rebuild_autocomplete()
+    print(f"Indexed {counts['titles']} titles and {counts['tags']} tags")
+
+
+async def archive_deleted(args: argparse.Namespace) -> None:
+    async with AsyncSessionLocal() as session:
+        archived = await archive_deleted_notes(
+            session,
+            retention_days=args.retention_days,
+            batch_size=args.batch_size,
+            max_batches=args.max_batches,
+        )
+    print(f"Archived {archived} notes")
+
+
+async def explain_plans(args: argparse.Namespace) -> int:
+    if not args.database_url:
+        print("explain-plans needs a scratch database: set TEST_DATABASE_URL or pass --database-url")
+        return 2
+    reports = await run_plan_checks(args.database_url, rows=args.rows)
+    print(format_reports(reports))
+    return 0 if all(report.ok for report in reports) else 1
+
+
+async def warm_cache(args: argparse.Namespace) -> int:
+    state = await run_warmup(stages=("cache",))
+    print(json.dumps(state, indent=2))
+    return 1 if state["errors"] else 0
+
+
+async def profile_report(args: argparse.Namespace) -> None:
+    print(format_summary(pstats.Stats(args.file), limit=args.top, sort=args.sort))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Notes API maintenance commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    facets = subparsers.add_parser("rebuild-facets", help="Recount tag/flag facets from Postgres into Redis")
+    facets.set_defaults(handler=rebuild_facets)
+
+    typeahead = subparsers.add_parser("rebuild-autocomplete", help="Rebuild the title/tag autocomplete sets from Postgres")
+    typeahead.set_defaults(handler=rebuild_autocomplete)
+
+    archive = subparsers.add_parser("archive-deleted", help="Move expired soft-deleted notes into notes_archive")
+    archive.add_argument("--retention-days", type=int, default=ARCHIVE_RETENTION_DAYS)
+    archive.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+    archive.add_argument("--max-batches", type=int, default=None)
+    archive.set_defaults(handler=archive_deleted)
+
+    plans = subparsers.add_parser(
+        "explain-plans",
+        help="EXPLAIN every NoteService query shape against seeded data (rolled back)",
+    )
+    plans.add_argument("--database-url", default=TEST_DATABASE_URL, help="defaults to TEST_DATABASE_URL")
+    plans.add_argument(
+        "--rows", type=int, default=CALIBRATED_ROWS, help="synthetic notes to seed (budgets assume the default)"
+    )
+    plans.set_defaults(handler=explain_plans)
+
+    warm = subparsers.add_parser("warm-cache", help="Preload hot notes into Redis")
+    warm.set_defaults(handler=warm_cache)
+
+    report = subparsers.add_parser("profile-report", help="Summarise a profile written by the profiling middleware")
+    report.add_argument("file", help="path to a .prof file in PROFILE_DIR")
+    report.add_argument("--top", type=int, default=PROFILE_TOP_N)
+    report.add_argument("--sort", default="tottime", choices=["tottime", "cumulative", "calls"])
+    report.set_defaults(handler=profile_report)
+
+    return parser
+
+
+async def run(args: argparse.Namespace) -> int:
+    try:
+        return await args.handler(args) or 0
+    finally:
+        await redis_client.close()
+        await redis_bytes_client.close()
+        await engine.dispose()
+
+
+def main() -> None:
+    setup_logger()
+    args = build_parser().parse_args()
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import gzip
+
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipResponder, IdentityResponder
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.config.settings import BROTLI_QUALITY, COMPRESSION_MIN_SIZE, GZIP_LEVEL
+
+try:
+    import brotli
+except ImportError:  # optional dependency: gzip only
+    brotli = None
+
+# Every encoding a cached body may be stored under, installed or not
+CACHED_ENCODINGS = ("br", "gzip")
+
+
+def supported_encodings() -> list[str]:
+    """Encodings this server can produce, most preferred first."""
+    return ["br", "gzip"] if brotli else ["gzip"]
+
+
+def preferred_encoding(accept_encoding: str | None) -> str | None:
+    """Pick the best supported encoding from an Accept-Encoding header (honours q=0)."""
+    if not accept_encoding:
+        return None
+    accepted = set()
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q=") and q[2:].strip() in ("0", "0.0", "0.00", "0.000"):
+            continue
+        accepted.add(name.strip().lower())
+    for encoding in supported_encodings():
+        if encoding in accepted or "*" in accepted:
+            return encoding
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+class BrotliResponder(IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, app: ASGIApp, minimum_size: int, quality: int = BROTLI_QUALITY) -> None:
+        super().__init__(app, minimum_size)
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        chunk = self.compressor.process(body)
+        if more_body:
+            return chunk + self.compressor.flush()
+        return chunk + self.compressor.finish()
+
+
+class CompressionMiddleware:
+    """
+    gzip / brotli response compression above `minimum_size` bytes.
+    Responses that already carry Content-Encoding (e.g. pre-compressed cached
+    notes) pass through untouched.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MIN_SIZE) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = preferred_encoding(Headers(scope=scope).get("Accept-Encoding"))
+        if encoding == "br":
+            responder = BrotliResponder(self.app, self.minimum_size)
+        elif encoding == "gzip":
+            responder = GZipResponder(self.app, self.minimum_size, compresslevel=GZIP_LEVEL)
+        else:
+            responder = IdentityResponder(self.app, self.minimum_size)
+        await responder(scope, receive, send)
@@ -0,0 +1,92 @@
+import time
+
+from fastapi import HTTPException, status
+
+from app.config.settings import (
+    DB_CONCURRENCY_MAX,
+    DB_CONCURRENCY_MIN,
+    DB_LATENCY_TARGET,
+    DB_SHED_RETRY_AFTER,
+)
+from app.middleware import logger
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD limit on in-flight DB-bound requests for one worker.
+
+    Every request finishing under `latency_target` grows the limit by
+    1/limit (about +1 per full window); a slow or failed one shrinks it by
+    `backoff`, at most once per `latency_target` so a single burst does not
+    collapse it. Requests over the limit are rejected immediately instead of
+    queueing on the connection pool.
+    """
+
+    def __init__(
+        self,
+        max_limit: int = DB_CONCURRENCY_MAX,
+        min_limit: int = DB_CONCURRENCY_MIN,
+        latency_target: float = DB_LATENCY_TARGET,
+        backoff: float = 0.9,
+    ):
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.latency_target = latency_target
+        self.backoff = backoff
+        self.limit = float(max_limit)
+        self.in_flight = 0
+        self._last_decrease = 0.0
+
+    def try_acquire(self) -> bool:
+        if self.in_flight >= int(self.limit):
+            return False
+        self.in_flight += 1
+        return True
+
+    def release(self, latency: float, failed: bool = False) -> None:
+        self.in_flight -= 1
+        if failed or latency > self.latency_target:
+            now = time.monotonic()
+            if now - self._last_decrease >= self.latency_target:
+                previous = self.limit
+                self.limit = max(float(self.min_limit), self.limit * self.backoff)
+                self._last_decrease = now
+                logger.info(
+                    f"[concurrency] Limit {previous:.1f} -> {self.limit:.1f} "
+                    f"(latency={latency:.3f}s, failed={failed})"
+                )
+        else:
+            self.limit = min(float(self.max_limit), self.limit + 1 / self.limit)
+
+
+db_limiter = AdaptiveConcurrencyLimiter()
+
+
+async def db_concurrency_limit():
+    """
+    Route dependency for DB-bound endpoints: fail fast with 503 + Retry-After
+    when the worker is at its adaptive limit, otherwise time the request and
+    feed the latency back into the limiter.
+    """
+    if not db_limiter.try_acquire():
+        logger.warning(
+            f"[concurrency] Shedding request: in_flight={db_limiter.in_flight} "
+            f"limit={db_limiter.limit:.1f}"
+        )
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please retry",
+            headers={"Retry-After": str(DB_SHED_RETRY_AFTER)},
+        )
+
+    start = time.perf_counter()
+    failed = False
+    try:
+        yield
+    except HTTPException:
+        raise
+    except Exception:
+        failed = True
+        raise
+    finally:
+        db_limiter.release(time.perf_counter() - start, failed)
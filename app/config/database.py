@@ -2,42 +2,85 @@ import os
 from dotenv import load_dotenv
 load_dotenv()
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy import event
 from typing import Annotated
 from fastapi import Depends
 import redis.asyncio as redis
 from logging.handlers import RotatingFileHandler
+from app.config.settings import (
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_STATEMENT_TIMEOUT_MS,
+    DB_LIST_STATEMENT_TIMEOUT_MS,
+    REDIS_SOCKET_TIMEOUT,
+    REDIS_CONNECT_TIMEOUT,
+    REDIS_BREAKER_FAILURES,
+    REDIS_BREAKER_RESET_TIMEOUT,
+)
+from app.circuit_breaker import BreakerRedis, CircuitBreaker
+
+# Short timeouts so a slow Redis fails fast; both clients share one breaker
+# because they talk to the same server.
+REDIS_TIMEOUTS = dict(
+    socket_timeout=REDIS_SOCKET_TIMEOUT,
+    socket_connect_timeout=REDIS_CONNECT_TIMEOUT,
+)
+redis_breaker = CircuitBreaker(
+    "redis",
+    failure_threshold=REDIS_BREAKER_FAILURES,
+    reset_timeout=REDIS_BREAKER_RESET_TIMEOUT,
+)
+redis_client = BreakerRedis(
+    redis.from_url(os.getenv('REDIS_URL'), encoding='utf-8', decode_responses = True, **REDIS_TIMEOUTS),
+    redis_breaker,
+)
+# Raw-bytes client for binary payloads (pre-compressed note bodies)
+redis_bytes_client = BreakerRedis(redis.from_url(os.getenv('REDIS_URL'), **REDIS_TIMEOUTS), redis_breaker)
+
+
+def normalise_database_url(url: str | None) -> str | None:
+    """asyncpg driver prefix and ssl=require unless the URL sets ssl= itself."""
+    if url:
+        # Convert postgres:// to postgresql+asyncpg://
+        if url.startswith("postgres://"):
+            url = url.replace("postgres://", "postgresql+asyncpg://", 1)
+        elif url.startswith("postgresql://"):
+            url = url.replace("postgresql://", "postgresql+asyncpg://", 1)
+        
+        # Remove any incorrect sslmode parameter
+        url = url.replace("sslmode=require", "")
+        url = url.replace("?sslmode=require", "")
+        url = url.replace("&sslmode=require", "")
+        
+        # Clean up any double question marks or ampersands
+        url = url.replace("??", "?").replace("?&", "?")
+        
+        # Add ssl=require if not present
+        if "ssl=" not in url.lower():
+            separator = "&" if "?" in url else "?"
+            url += f"{separator}ssl=require"
+        
+        # Strip any whitespace
+        url = url.strip()
+    return url
 
-redis_client = redis.from_url(os.getenv('REDIS_URL'), encoding='utf-8', decode_responses = True)
-DATABASE_URL = os.getenv("DATABASE_URL")
-DATABASE_URL = os.getenv("DATABASE_URL")
-
-if DATABASE_URL:
-    # Convert postgres:// to postgresql+asyncpg://
-    if DATABASE_URL.startswith("postgres://"):
-        DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql+asyncpg://", 1)
-    elif DATABASE_URL.startswith("postgresql://"):
-        DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1)
-    
-    # Remove any incorrect sslmode parameter
-    DATABASE_URL = DATABASE_URL.replace("sslmode=require", "")
-    DATABASE_URL = DATABASE_URL.replace("?sslmode=require", "")
-    DATABASE_URL = DATABASE_URL.replace("&sslmode=require", "")
-    
-    # Clean up any double question marks or ampersands
-    DATABASE_URL = DATABASE_URL.replace("??", "?").replace("?&", "?")
-    
-    # Add ssl=require if not present
-    if "ssl=" not in DATABASE_URL.lower():
-        separator = "&" if "?" in DATABASE_URL else "?"
-        DATABASE_URL += f"{separator}ssl=require"
-    
-    # Strip any whitespace
-    DATABASE_URL = DATABASE_URL.strip()
+
+DATABASE_URL = normalise_database_url(os.getenv("DATABASE_URL"))
 
 print(f"Final DATABASE_URL: {DATABASE_URL}")
 
-engine = create_async_engine(DATABASE_URL, echo=True)
+engine = create_async_engine(
+    DATABASE_URL,
+    echo=True,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    # Default for every connection, set once at connect; sessions that need
+    # another limit override it per transaction (see below)
+    connect_args={"server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}},
+)
 
 AsyncSessionLocal = sessionmaker(
     autocommit=False,
@@ -47,9 +90,28 @@ AsyncSessionLocal = sessionmaker(
     expire_on_commit=False,
 )
 
+@event.listens_for(Session, "after_begin")
+def _apply_statement_timeout(session, transaction, connection):
+    """Override the connection's statement_timeout for each transaction of a session that asks."""
+    timeout_ms = session.info.get("statement_timeout_ms")
+    if timeout_ms is not None:
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
+
+
+def session_with_timeout(timeout_ms: int):
+    """Session dependency whose queries are cancelled by Postgres after `timeout_ms` (0 = never)."""
+    async def get_session() -> AsyncSession:
+        async with AsyncSessionLocal(info={"statement_timeout_ms": timeout_ms}) as session:
+            yield session
+    return get_session
+
+
 async def get_async_session() -> AsyncSession:
     """Provides a managed asynchronous database session to endpoints."""
     async with AsyncSessionLocal() as session:
         yield session
 
+
 SessionDep = Annotated[AsyncSession, Depends(get_async_session)]
+# List queries can scan a lot; cap them tighter so they can't hold connections
+ListSessionDep = Annotated[AsyncSession, Depends(session_with_timeout(DB_LIST_STATEMENT_TIMEOUT_MS))]
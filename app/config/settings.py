@@ -0,0 +1,85 @@
+import os
+from dotenv import load_dotenv
+load_dotenv()
+
+# Scratch database for `python -m app.cli explain-plans` (never the app's DATABASE_URL)
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", "")
+
+# Archival of soft-deleted notes into notes_archive
+ARCHIVE_RETENTION_DAYS = int(os.getenv("ARCHIVE_RETENTION_DAYS", "30"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))
+# Seconds between in-app archival runs; 0 disables the periodic task
+ARCHIVE_INTERVAL_SECONDS = int(os.getenv("ARCHIVE_INTERVAL_SECONDS", "3600"))
+
+# HTTP response compression (brotli is used only if the package is installed)
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "500"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))
+
+# Recently viewed tracking (sorted set per user, written off the request path)
+RECENT_VIEWS_LIMIT = int(os.getenv("RECENT_VIEWS_LIMIT", "10"))
+RECENT_VIEWS_BATCH_SIZE = int(os.getenv("RECENT_VIEWS_BATCH_SIZE", "500"))
+RECENT_VIEWS_FLUSH_INTERVAL = float(os.getenv("RECENT_VIEWS_FLUSH_INTERVAL", "0.05"))
+RECENT_VIEWS_QUEUE_SIZE = int(os.getenv("RECENT_VIEWS_QUEUE_SIZE", "10000"))
+
+# Coalescing of concurrent note lookups (0 window = same event-loop tick)
+NOTE_LOADER_WINDOW = float(os.getenv("NOTE_LOADER_WINDOW", "0.001"))
+NOTE_LOADER_MAX_BATCH = int(os.getenv("NOTE_LOADER_MAX_BATCH", "100"))
+
+# Group commit for POST /notes (CREATE_GROUP_COMMIT=1): creates arriving within
+# the window share one multi-row INSERT and one commit
+CREATE_GROUP_COMMIT = os.getenv("CREATE_GROUP_COMMIT", "0") == "1"
+CREATE_GROUP_COMMIT_WINDOW = float(os.getenv("CREATE_GROUP_COMMIT_WINDOW", "0.002"))
+CREATE_GROUP_COMMIT_MAX_BATCH = int(os.getenv("CREATE_GROUP_COMMIT_MAX_BATCH", "100"))
+
+# Multi-get endpoint
+NOTES_BATCH_MAX_IDS = int(os.getenv("NOTES_BATCH_MAX_IDS", "100"))
+
+# List totals (?count=auto|exact|estimate): auto counts exactly only when the
+# planner expects at most COUNT_EXACT_THRESHOLD rows; exact counts are cached per filter set
+COUNT_EXACT_THRESHOLD = int(os.getenv("COUNT_EXACT_THRESHOLD", "10000"))
+COUNT_CACHE_TTL = int(os.getenv("COUNT_CACHE_TTL", "60"))
+
+# Database pool and statement timeouts (milliseconds, 0 = no timeout)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "5000"))
+DB_LIST_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_LIST_STATEMENT_TIMEOUT_MS", "2000"))
+
+# Adaptive (AIMD) limit on in-flight DB-bound requests per worker
+DB_CONCURRENCY_MAX = int(os.getenv("DB_CONCURRENCY_MAX", str(DB_POOL_SIZE + DB_MAX_OVERFLOW)))
+DB_CONCURRENCY_MIN = int(os.getenv("DB_CONCURRENCY_MIN", "1"))
+DB_LATENCY_TARGET = float(os.getenv("DB_LATENCY_TARGET", "0.5"))
+DB_SHED_RETRY_AFTER = int(os.getenv("DB_SHED_RETRY_AFTER", "1"))
+
+# Redis timeouts and circuit breaker
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "0.5"))
+REDIS_CONNECT_TIMEOUT = float(os.getenv("REDIS_CONNECT_TIMEOUT", "0.5"))
+REDIS_BREAKER_FAILURES = int(os.getenv("REDIS_BREAKER_FAILURES", "5"))
+REDIS_BREAKER_RESET_TIMEOUT = float(os.getenv("REDIS_BREAKER_RESET_TIMEOUT", "5"))
+
+# Warm-up at startup (WARMUP_ENABLED=0 to skip) and via `python -m app.cli warm-cache`
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "1") == "1"
+WARMUP_MAX_NOTES = int(os.getenv("WARMUP_MAX_NOTES", "2000"))
+WARMUP_BATCH_SIZE = int(os.getenv("WARMUP_BATCH_SIZE", "200"))
+
+# Per-request profiling: send `X-Profile: <PROFILE_ADMIN_TOKEN>` (empty disables the
+# header) or sample a fraction of requests; profiles are written to PROFILE_DIR
+PROFILE_ADMIN_TOKEN = os.getenv("PROFILE_ADMIN_TOKEN", "")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "data/profiles")
+PROFILE_TOP_N = int(os.getenv("PROFILE_TOP_N", "25"))
+
+# Production launcher (python -m app.launcher). WEB_CONCURRENCY=0 means one
+# worker per available CPU, capped by the container's cgroup CPU quota. The per-replica connection budget is
+# DB_CONNECTION_BUDGET, or (max_connections - reserved) / SERVER_REPLICAS when 0.
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "0"))
+SERVER_HOST = os.getenv("SERVER_HOST", "0.0.0.0")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "8000"))
+SERVER_REPLICAS = int(os.getenv("SERVER_REPLICAS", "1"))
+DB_CONNECTION_BUDGET = int(os.getenv("DB_CONNECTION_BUDGET", "0"))
+DB_RESERVED_CONNECTIONS = int(os.getenv("DB_RESERVED_CONNECTIONS", "10"))
+SHUTDOWN_TIMEOUT = int(os.getenv("SHUTDOWN_TIMEOUT", "30"))
+MIGRATION_LOCK_KEY = int(os.getenv("MIGRATION_LOCK_KEY", "727001"))
+MIGRATION_LOCK_TIMEOUT = float(os.getenv("MIGRATION_LOCK_TIMEOUT", "300"))
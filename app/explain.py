@@ -0,0 +1,25 @@
+import json
+
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) wrapper that keeps the statement's bind processing."""
+
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+def plan_root(explain_output) -> dict:
+    """The top plan node from EXPLAIN (FORMAT JSON) output (asyncpg may return text)."""
+    if isinstance(explain_output, str):
+        explain_output = json.loads(explain_output)
+    return explain_output[0]["Plan"]
@@ -0,0 +1,193 @@
+"""
+Production launcher: migrate once, size the DB pools, then run N uvicorn workers.
+
+Usage (what entrypoint.sh runs):
+    python -m app.launcher [--workers N] [--host HOST] [--port PORT] [--skip-migrations]
+
+1. Takes a Postgres advisory lock and runs `alembic upgrade head` while holding
+   it. Replicas starting together queue on the lock; the first migrates, the
+   rest find the schema already at head.
+2. Splits the connection budget (max_connections minus reserved slots, shared
+   by SERVER_REPLICAS replicas, or DB_CONNECTION_BUDGET if set) across the
+   workers and exports DB_POOL_SIZE / DB_MAX_OVERFLOW for them, so
+   workers x (pool_size + max_overflow) stays under the server's limit.
+3. Replaces itself with uvicorn (uvloop, httptools). On SIGTERM uvicorn stops
+   accepting connections, lets in-flight requests finish for up to
+   SHUTDOWN_TIMEOUT seconds, then runs the app's lifespan shutdown.
+"""
+import argparse
+import asyncio
+import math
+import os
+import subprocess
+import sys
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.config.logging import setup_logger
+from app.config.settings import (
+    DB_CONNECTION_BUDGET,
+    DB_MAX_OVERFLOW,
+    DB_POOL_SIZE,
+    DB_RESERVED_CONNECTIONS,
+    MIGRATION_LOCK_KEY,
+    MIGRATION_LOCK_TIMEOUT,
+    SERVER_HOST,
+    SERVER_PORT,
+    SERVER_REPLICAS,
+    SHUTDOWN_TIMEOUT,
+    WEB_CONCURRENCY,
+)
+from app.middleware import logger
+
+
+def cgroup_cpu_limit() -> int | None:
+    """
+    CPUs allowed by the container's CFS quota (cgroup v2 cpu.max, else v1),
+    rounded up; None when no quota is set or the files aren't there.
+    """
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()[:2]
+    except (OSError, ValueError):
+        try:
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+                quota = f.read().strip()
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+                period = f.read().strip()
+        except OSError:
+            return None
+    if quota in ("max", "-1"):
+        return None
+    try:
+        return max(1, math.ceil(int(quota) / int(period)))
+    except (ValueError, ZeroDivisionError):
+        return None
+
+
+def default_workers() -> int:
+    """
+    WEB_CONCURRENCY, else the CPUs this process may use: its affinity mask,
+    capped by the cgroup CPU quota. Neither affinity nor cpu_count() sees the
+    quota, so a `--cpus 2` container on a 64-core host would otherwise get 64.
+    """
+    if WEB_CONCURRENCY > 0:
+        return WEB_CONCURRENCY
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS
+        cpus = os.cpu_count() or 1
+    limit = cgroup_cpu_limit()
+    return min(cpus, limit) if limit else cpus
+
+
+def size_pool(
+    budget: int,
+    workers: int,
+    pool_size: int = DB_POOL_SIZE,
+    max_overflow: int = DB_MAX_OVERFLOW,
+) -> tuple[int, int]:
+    """
+    Per-worker (pool_size, max_overflow) so that workers x (pool_size + max_overflow)
+    fits in `budget`. The configured sizes are kept when they already fit;
+    otherwise the persistent pool is shrunk first and overflow gets the rest.
+    """
+    per_worker = budget // workers
+    if pool_size + max_overflow <= per_worker:
+        return pool_size, max_overflow
+    pool_size = max(1, min(pool_size, per_worker))
+    return pool_size, max(0, per_worker - pool_size)
+
+
+async def connection_budget(conn: AsyncConnection) -> int:
+    """Connections this replica may open, from DB_CONNECTION_BUDGET or the server's limits."""
+    if DB_CONNECTION_BUDGET > 0:
+        return DB_CONNECTION_BUDGET
+    max_connections = int((await conn.execute(text("SHOW max_connections"))).scalar())
+    reserved = int((await conn.execute(text("SHOW superuser_reserved_connections"))).scalar())
+    budget = (max_connections - reserved - DB_RESERVED_CONNECTIONS) // SERVER_REPLICAS
+    logger.info(
+        f"[launcher] max_connections={max_connections} superuser_reserved={reserved} "
+        f"reserved={DB_RESERVED_CONNECTIONS} replicas={SERVER_REPLICAS} -> budget={budget}"
+    )
+    return budget
+
+
+def run_migrations() -> None:
+    # Alembic's env.py runs its own event loop, so it gets its own process.
+    subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], check=True)
+
+
+async def prepare(database_url: str, migrate: bool = True) -> int:
+    """Run migrations under the advisory lock (if asked) and return the connection budget."""
+    engine = create_async_engine(database_url, poolclass=NullPool)
+    try:
+        async with engine.connect() as conn:
+            budget = await connection_budget(conn)
+            if migrate:
+                await conn.execute(text(f"SET lock_timeout = '{int(MIGRATION_LOCK_TIMEOUT * 1000)}ms'"))
+                print("Waiting for the migration lock...")
+                await conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+                try:
+                    print("Running Alembic migrations...")
+                    await asyncio.to_thread(run_migrations)
+                finally:
+                    await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+                await conn.commit()
+    finally:
+        await engine.dispose()
+    return budget
+
+
+def uvicorn_command(host: str, port: int, workers: int) -> list[str]:
+    return [
+        sys.executable, "-m", "uvicorn", "main:app",
+        "--host", host,
+        "--port", str(port),
+        "--workers", str(workers),
+        "--loop", "uvloop",
+        "--http", "httptools",
+        "--timeout-graceful-shutdown", str(SHUTDOWN_TIMEOUT),
+    ]
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.launcher", description="Run the Notes API in production")
+    parser.add_argument("--workers", type=int, default=default_workers())
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--skip-migrations", action="store_true", help="do not run alembic upgrade head")
+    return parser
+
+
+def main() -> None:
+    setup_logger()
+    args = build_parser().parse_args()
+
+    # Imported here so the URL is normalised exactly as the app does it
+    from app.config.database import DATABASE_URL
+
+    budget = asyncio.run(prepare(DATABASE_URL, migrate=not args.skip_migrations))
+    workers = args.workers
+    if budget < workers:
+        logger.warning(f"[launcher] Connection budget {budget} < {workers} workers; running {max(1, budget)}")
+        workers = max(1, budget)
+    pool_size, max_overflow = size_pool(budget, workers)
+
+    # exec a fresh interpreter: it imports app.config.settings with these values
+    # (this process already built its engine from the old ones) and, as PID 1,
+    # receives the container's SIGTERM directly.
+    os.environ["DB_POOL_SIZE"] = str(pool_size)
+    os.environ["DB_MAX_OVERFLOW"] = str(max_overflow)
+    print(
+        f"Starting API: {workers} workers, pool_size={pool_size} max_overflow={max_overflow} "
+        f"({workers * (pool_size + max_overflow)}/{budget} connections)"
+    )
+    sys.stdout.flush()
+    os.execvp(sys.executable, uvicorn_command(args.host, args.port, workers))
+
+
+if __name__ == "__main__":
+    main()
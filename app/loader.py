@@ -0,0 +1,145 @@
+import asyncio
+from typing import Awaitable, Callable, Hashable
+
+from app.middleware import logger
+
+
+class BatchLoader:
+    """
+    DataLoader-style request coalescing, one instance per worker process.
+
+    Keys requested within `window` seconds (0 = the same event-loop tick) are
+    deduplicated and resolved by a single call to `batch_fn(keys)`, which
+    returns a mapping of key -> value (missing keys resolve to None).
+    Callers asking for a key that is already being fetched share that fetch.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[list], Awaitable[dict]],
+        window: float = 0.001,
+        max_batch_size: int = 100,
+    ):
+        self.batch_fn = batch_fn
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self._pending: dict[Hashable, asyncio.Future] = {}
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+        self._handle: asyncio.Handle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def load(self, key: Hashable):
+        future = self._pending.get(key) or self._inflight.get(key)
+        if future is None:
+            future = self._enqueue(key)
+        # shield: one caller being cancelled must not cancel the shared result
+        return await asyncio.shield(future)
+
+    def _enqueue(self, key: Hashable) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending[key] = future
+        if len(self._pending) >= self.max_batch_size:
+            self._dispatch()
+        elif self._handle is None:
+            if self.window > 0:
+                self._handle = loop.call_later(self.window, self._dispatch)
+            else:
+                self._handle = loop.call_soon(self._dispatch)
+        return future
+
+    def _dispatch(self) -> None:
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        batch, self._pending = self._pending, {}
+        if not batch:
+            return
+        self._inflight.update(batch)
+        task = asyncio.create_task(self._resolve(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _resolve(self, batch: dict[Hashable, asyncio.Future]) -> None:
+        try:
+            results = await self.batch_fn(list(batch))
+        except Exception as e:
+            logger.error(f"[loader] Batch of {len(batch)} keys failed: {str(e)}")
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for key, future in batch.items():
+                if not future.done():
+                    future.set_result(results.get(key))
+        finally:
+            for key, future in batch.items():
+                if self._inflight.get(key) is future:
+                    del self._inflight[key]
+
+
+class GroupCommitter:
+    """
+    Group commit for writes, one instance per worker process.
+
+    Items submitted within `window` seconds are handed together to
+    `commit_fn(items)`, which writes them in one transaction and returns one
+    result per item, in order. A result that is an exception is raised to
+    that caller only; if `commit_fn` itself fails, every caller gets the error.
+    Unlike BatchLoader nothing is deduplicated: each submit is its own write.
+    """
+
+    def __init__(
+        self,
+        commit_fn: Callable[[list], Awaitable[list]],
+        window: float = 0.002,
+        max_batch_size: int = 100,
+    ):
+        self.commit_fn = commit_fn
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self._pending: list[tuple[object, asyncio.Future]] = []
+        self._handle: asyncio.Handle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def submit(self, item):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._dispatch()
+        elif self._handle is None:
+            if self.window > 0:
+                self._handle = loop.call_later(self.window, self._dispatch)
+            else:
+                self._handle = loop.call_soon(self._dispatch)
+        # shield: a cancelled caller must not abort the commit for the others
+        return await asyncio.shield(future)
+
+    def _dispatch(self) -> None:
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        task = asyncio.create_task(self._commit(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _commit(self, batch: list[tuple[object, asyncio.Future]]) -> None:
+        try:
+            results = await self.commit_fn([item for item, _ in batch])
+        except Exception as e:
+            logger.error(f"[group-commit] Batch of {len(batch)} items failed: {str(e)}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
@@ -2,7 +2,7 @@ from typing import Annotated, Optional, List
 from datetime import datetime, timezone
 from fastapi import Depends, FastAPI, HTTPException, Query
 from sqlmodel import Field, Session, SQLModel, create_engine, select, Column, JSON
-from sqlalchemy import DateTime, Boolean
+from sqlalchemy import DateTime, Boolean, Index, text
 from sqlalchemy.sql import func
 import uuid
 
@@ -25,11 +25,25 @@ class TimeStamp(SQLModel):
 class Notes(TimeStamp, table=True):
     
     __tablename__ = 'notes'
+    __table_args__ = (
+        # Live queries always filter on deleted_at IS NULL; keep their indexes
+        # free of soft-deleted rows.
+        Index("ix_notes_live_title", "title", postgresql_where=text("deleted_at IS NULL")),
+        Index("ix_notes_live_is_public", "is_public", postgresql_where=text("deleted_at IS NULL")),
+        Index("ix_notes_live_is_pinned", "is_pinned", postgresql_where=text("deleted_at IS NULL")),
+        # Serves the `tags` filter (CAST(tag AS JSONB) @> '["x"]'), live or not.
+        Index(
+            "ix_notes_tag_gin",
+            text("(CAST(tag AS JSONB)) jsonb_path_ops"),
+            postgresql_using="gin",
+        ),
+        # Lets the archival job find expired soft-deleted rows without a scan.
+        Index("ix_notes_deleted_at", "deleted_at", postgresql_where=text("deleted_at IS NOT NULL")),
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True)
     
     title: str  = Field(
-        index=True,
         min_length=1,
         max_length=100,
         description = "Note title (1-100) characters "
@@ -48,12 +62,12 @@ class Notes(TimeStamp, table=True):
         )
     
     # #public/private
-    is_public: bool  = Field( default=False, index=True )
+    is_public: bool  = Field( default=False )
     
     # pinned 
     is_pinned: bool = Field(
         default=False,
-        sa_column=Column(Boolean, server_default='0', nullable=False, index=True)
+        sa_column=Column(Boolean, server_default='0', nullable=False)
     )    
     
     #soft delete feature
@@ -62,6 +76,32 @@ class Notes(TimeStamp, table=True):
         sa_column= Column(DateTime, nullable=True),
         description = "Note when note was deleted (NULL if not deleted)"
     )
-    
-    
-    
+
+
+class NotesArchive(SQLModel, table=True):
+    """
+    Soft-deleted notes moved out of `notes` once they pass the retention period.
+    Rows keep their original id so they can be restored in place.
+    """
+
+    __tablename__ = 'notes_archive'
+
+    id: int = Field(primary_key=True, sa_column_kwargs={"autoincrement": False})
+    title: str = Field(max_length=100)
+    content: str = Field(max_length=5000)
+    tag: Optional[List[str]] = Field(default=None, sa_column=Column(JSON))
+    is_public: bool = Field(default=False)
+    is_pinned: bool = Field(
+        default=False,
+        sa_column=Column(Boolean, server_default='0', nullable=False)
+    )
+    created_at: datetime = Field(sa_column=Column(DateTime(timezone=True), nullable=False))
+    updated_at: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(DateTime(timezone=True), nullable=True)
+    )
+    deleted_at: datetime = Field(sa_column=Column(DateTime, nullable=False))
+    archived_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_column=Column(DateTime(timezone=True), nullable=False, server_default=func.now(), index=True)
+    )
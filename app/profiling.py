@@ -0,0 +1,151 @@
+"""
+Opt-in per-request profiling.
+
+A request is profiled with cProfile when it carries `X-Profile: <PROFILE_ADMIN_TOKEN>`
+or is picked by PROFILE_SAMPLE_RATE. The profile is written to
+PROFILE_DIR/<id>.prof (open it with `python -m app.cli profile-report <file>`,
+snakeviz, etc.) and the top functions are logged. Admin-header requests also
+get the profile id and a short top-functions summary back in response headers.
+
+Profiling stops when the response starts, so it covers routing, dependencies,
+the handler, serialization and compression but not a streamed body. cProfile
+sees the whole thread: other requests interleaved on the event loop show up
+too, which is why only one request per worker is profiled at a time. Time
+spent waiting on Postgres/Redis shows up as the event loop's epoll/select,
+and work pushed to the threadpool (sync endpoints, to_thread) is not seen.
+"""
+import asyncio
+import cProfile
+import hmac
+import io
+import pstats
+import random
+import re
+import time
+import uuid
+from pathlib import Path
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config.settings import PROFILE_ADMIN_TOKEN, PROFILE_DIR, PROFILE_SAMPLE_RATE, PROFILE_TOP_N
+from app.middleware import logger
+
+PROFILE_HEADER = "X-Profile"
+HEADER_SUMMARY_FUNCTIONS = 5
+
+
+def top_functions(stats: pstats.Stats, limit: int = PROFILE_TOP_N, sort: str = "tottime") -> list[dict]:
+    """The `limit` most expensive functions, by own time unless `sort` says otherwise."""
+    stats.sort_stats(sort)
+    rows = []
+    for func in stats.fcn_list[:limit]:
+        _, calls, tottime, cumtime, _ = stats.stats[func]
+        filename, line, name = func
+        rows.append({
+            "function": f"{filename}:{line}({name})" if line else name,
+            "calls": calls,
+            "tottime": round(tottime, 6),
+            "cumtime": round(cumtime, 6),
+        })
+    return rows
+
+
+def format_summary(stats: pstats.Stats, limit: int = PROFILE_TOP_N, sort: str = "tottime") -> str:
+    """pstats' own table of the top `limit` functions, as text."""
+    out = io.StringIO()
+    stats.stream = out
+    stats.sort_stats(sort).print_stats(limit)
+    return out.getvalue()
+
+
+def _profile_id(scope: Scope) -> str:
+    path = re.sub(r"[^A-Za-z0-9]+", "_", scope.get("path", "")).strip("_") or "root"
+    return f"{time.strftime('%Y%m%dT%H%M%S')}-{scope.get('method', 'GET')}-{path[:60]}-{uuid.uuid4().hex[:8]}"
+
+
+def _write_profile(profiler: cProfile.Profile, directory: Path, profile_id: str) -> pstats.Stats:
+    directory.mkdir(parents=True, exist_ok=True)
+    stats = pstats.Stats(profiler)
+    stats.dump_stats(directory / f"{profile_id}.prof")
+    return stats
+
+
+class ProfilingMiddleware:
+    """Wrap selected requests in cProfile; everything else passes straight through."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        admin_token: str = PROFILE_ADMIN_TOKEN,
+        sample_rate: float = PROFILE_SAMPLE_RATE,
+        directory: str = PROFILE_DIR,
+    ) -> None:
+        self.app = app
+        self.admin_token = admin_token
+        self.sample_rate = sample_rate
+        self.directory = Path(directory)
+        self._active = False
+
+    def _is_admin(self, scope: Scope) -> bool:
+        if not self.admin_token:
+            return False
+        supplied = Headers(scope=scope).get(PROFILE_HEADER)
+        return supplied is not None and hmac.compare_digest(supplied.encode(), self.admin_token.encode())
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self._active:
+            await self.app(scope, receive, send)
+            return
+
+        is_admin = self._is_admin(scope)
+        if not is_admin and not (self.sample_rate > 0 and random.random() < self.sample_rate):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = _profile_id(scope)
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError as e:  # another profiler owns this thread
+            logger.warning(f"[profile] Skipping {profile_id}: {str(e)}")
+            await self.app(scope, receive, send)
+            return
+        self._active = True
+        stopped = False
+
+        async def stop() -> pstats.Stats | None:
+            nonlocal stopped
+            if stopped:
+                return None
+            stopped = True
+            profiler.disable()
+            self._active = False
+            try:
+                stats = await asyncio.to_thread(_write_profile, profiler, self.directory, profile_id)
+            except Exception as e:
+                logger.error(f"[profile] Could not write profile {profile_id}: {str(e)}")
+                return None
+            logger.info(
+                f"[profile] {scope.get('method')} {scope.get('path')} -> {self.directory / profile_id}.prof\n"
+                f"{format_summary(stats)}"
+            )
+            return stats
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                stats = await stop()
+                if is_admin:
+                    headers = MutableHeaders(scope=message)
+                    headers["X-Profile-Id"] = profile_id
+                    if stats is not None:
+                        headers["X-Profile-Top"] = "; ".join(
+                            f"{row['function'].rsplit('/', 1)[-1]}={row['tottime']:.4f}s"
+                            for row in top_functions(stats, HEADER_SUMMARY_FUNCTIONS)
+                        )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            await stop()
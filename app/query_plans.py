@@ -0,0 +1,223 @@
+"""
+Query-plan regression harness.
+
+Builds every statement shape NoteService can emit, runs EXPLAIN (FORMAT JSON)
+for each against a seeded Postgres and flags shapes that fall back to a
+sequential scan on `notes` or exceed a cost budget.
+
+Seeding, ANALYZE and the EXPLAINs all run inside one transaction that is
+rolled back. It runs against TEST_DATABASE_URL (a scratch database migrated
+to head), never the app's DATABASE_URL:
+
+    python -m app.cli explain-plans [--rows 100000]
+
+Each shape carries its own cost budget, calibrated on PostgreSQL 16 with the
+default 100k seeded rows (about 1.5x the highest cost seen over repeated
+runs; tag shapes vary most because ANALYZE samples JSONB containment). Shapes
+allowed to scan `notes` sequentially say why. Seeding a different number of
+rows shifts the costs, so budgets only hold at CALIBRATED_ROWS.
+"""
+import itertools
+from dataclasses import dataclass, field
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.config.database import normalise_database_url
+from app.explain import Explain, plan_root
+from app.middleware import logger
+from app.service import NoteService
+
+WATCHED_TABLES = {"notes"}
+SAMPLE_TAGS = ["tag-1", "tag-2"]
+CALIBRATED_ROWS = 100_000
+
+# Why a sequential scan is an acceptable plan, shared by the shapes it applies to
+BROAD_FLAGS = "every filter matches >=45% of notes: LIMIT stops the scan after ~50 rows"
+RARE_PINNED = "5% of notes are pinned and no partial index covers deleted rows: LIMIT stops after ~400 rows"
+TAG_UNDER_LIMIT = "each sample tag is on 2% of notes: LIMIT stops the scan after ~1000 rows, cheaper than the GIN bitmap"
+TAG_PINNED_DELETED = (
+    "tag + pinned matches ~0.1% of notes and no partial index covers deleted rows: "
+    "the planner picks a scan or a GIN bitmap at similar cost"
+)
+
+
+@dataclass
+class QueryShape:
+    name: str
+    statement: object
+    # Planner cost budget at CALIBRATED_ROWS seeded rows
+    max_cost: float
+    # Why a sequential scan on `notes` is acceptable here; empty means it is a regression
+    seq_scan_ok: str = ""
+
+
+@dataclass
+class PlanReport:
+    shape: QueryShape
+    total_cost: float
+    seq_scans: list[str] = field(default_factory=list)
+    failures: list[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.failures
+
+
+def query_shapes(page_size: int = 20) -> list[QueryShape]:
+    """Every statement shape NoteService emits, one per filter combination."""
+    shapes = [
+        QueryShape("create_note.duplicate_title", NoteService.duplicate_title_statement("title-42"), 25),
+        QueryShape(
+            "create_notes_batch.live_titles",
+            NoteService.live_titles_statement([f"title-{i}" for i in range(100)]),
+            800,
+        ),
+        QueryShape("get_note_by_id", NoteService.live_notes_by_ids_statement([42]), 25),
+        QueryShape(
+            "get_recently_viewed.ids_in", NoteService.live_notes_by_ids_statement(list(range(1, 11))), 75
+        ),
+        QueryShape(
+            "load_notes_batch.ids_in", NoteService.live_notes_by_ids_statement(list(range(1, 101))), 600
+        ),
+    ]
+
+    tag_options = [None, SAMPLE_TAGS[:1], SAMPLE_TAGS]
+    flag_options = [None, True, False]
+    for tags, is_public, is_pinned, show_deleted in itertools.product(
+        tag_options, flag_options, flag_options, [False, True]
+    ):
+        name = (
+            f"get_all_notes[tags={len(tags) if tags else 0},"
+            f"is_public={is_public},is_pinned={is_pinned},show_deleted={show_deleted}]"
+        )
+        statement = NoteService.list_statement(
+            offset=0,
+            limit=page_size,
+            is_public=is_public,
+            is_pinned=is_pinned,
+            tags=tags,
+            show_deleted=show_deleted,
+        )
+        shapes.append(QueryShape(name, statement, *_list_budget(bool(tags), is_pinned, show_deleted)))
+
+    shapes.append(QueryShape(
+        "get_all_notes[fields=title,tag,excerpt=200,tags=1]",
+        NoteService.list_statement(
+            offset=0, limit=page_size, tags=SAMPLE_TAGS[:1], fields=["title", "tag"], excerpt=200
+        ),
+        400,
+        TAG_UNDER_LIMIT,
+    ))
+    # A full scan costs about the same as the GIN bitmap here, so only the
+    # seq-scan check (not the budget) notices ix_notes_tag_gin going away
+    shapes.append(QueryShape(
+        "count_notes[exact,tags=1]", NoteService.count_statement(tags=SAMPLE_TAGS[:1]), 8500,
+    ))
+    return shapes
+
+
+def _list_budget(tagged: bool, is_pinned: bool | None, show_deleted: bool) -> tuple[float, str]:
+    """(max_cost, seq_scan_ok) for a get_all_notes shape, by how selective its filters are."""
+    if tagged and is_pinned:
+        # Live rows use ix_notes_live_is_pinned, alone or ANDed with the GIN bitmap
+        return (6000, TAG_PINNED_DELETED) if show_deleted else (3500, "")
+    if tagged:
+        return 400, TAG_UNDER_LIMIT
+    if is_pinned:
+        return (75, RARE_PINNED) if show_deleted else (35, "")
+    return 10, BROAD_FLAGS
+
+
+async def seed_notes(session: AsyncSession, rows: int) -> None:
+    """
+    Replace the table's contents with `rows` synthetic notes with a realistic
+    distribution: ~50% public, ~5% pinned, ~10% soft-deleted, 57 distinct tags
+    (each of tag-0..tag-49 on 2% of notes).
+
+    TRUNCATE (rolled back with everything else) gives every run the same
+    physical table; rolled-back INSERTs alone leave dead tuples that inflate
+    the costs of the next run.
+    """
+    await session.execute(text("TRUNCATE notes"))
+    await session.execute(
+        text(
+            """
+            INSERT INTO notes (title, content, tag, is_public, is_pinned, created_at, deleted_at)
+            SELECT
+                'seed-' || g,
+                repeat('lorem ipsum ', 20),
+                json_build_array('tag-' || (g % 50), 'tag-' || (g % 7 + 50)),
+                g % 2 = 0,
+                g % 20 = 0,
+                now(),
+                CASE WHEN g % 10 = 0 THEN now() - interval '1 day' END
+            FROM generate_series(1, :rows) AS g
+            """
+        ),
+        {"rows": rows},
+    )
+    await session.execute(text("ANALYZE notes"))
+
+
+def _walk(node: dict):
+    yield node
+    for child in node.get("Plans", []):
+        yield from _walk(child)
+
+
+async def explain_shape(session: AsyncSession, shape: QueryShape) -> PlanReport:
+    result = await session.execute(Explain(shape.statement))
+    plan = plan_root(result.scalar())
+
+    report = PlanReport(shape=shape, total_cost=plan["Total Cost"])
+    for node in _walk(plan):
+        if node["Node Type"] == "Seq Scan" and node.get("Relation Name") in WATCHED_TABLES:
+            report.seq_scans.append(node["Relation Name"])
+
+    if report.seq_scans and not shape.seq_scan_ok:
+        report.failures.append(f"sequential scan on {', '.join(report.seq_scans)}")
+    if report.total_cost > shape.max_cost:
+        report.failures.append(f"cost {report.total_cost:.1f} > budget {shape.max_cost:.1f}")
+    return report
+
+
+async def run_plan_checks(database_url: str, rows: int = CALIBRATED_ROWS) -> list[PlanReport]:
+    """Seed, explain every shape and roll everything back."""
+    if rows != CALIBRATED_ROWS:
+        logger.warning(f"[plans] Budgets are calibrated for {CALIBRATED_ROWS} rows, seeding {rows}")
+    engine = create_async_engine(normalise_database_url(database_url), poolclass=NullPool)
+    try:
+        async with AsyncSession(engine) as session:
+            try:
+                if rows > 0:
+                    await seed_notes(session, rows)
+                reports = [await explain_shape(session, shape) for shape in query_shapes()]
+            finally:
+                await session.rollback()
+    finally:
+        await engine.dispose()
+
+    for report in reports:
+        if not report.ok:
+            logger.warning(f"[plans] {report.shape.name}: {'; '.join(report.failures)}")
+    return reports
+
+
+def format_reports(reports: list[PlanReport]) -> str:
+    width = max(len(r.shape.name) for r in reports)
+    lines = [f"{'shape'.ljust(width)}  {'cost':>10}  {'budget':>8}  result"]
+    for report in reports:
+        if not report.ok:
+            status = "FAIL: " + "; ".join(report.failures)
+        elif report.seq_scans:
+            status = f"ok (seq scan: {report.shape.seq_scan_ok})"
+        else:
+            status = "ok"
+        lines.append(
+            f"{report.shape.name.ljust(width)}  {report.total_cost:>10.1f}  {report.shape.max_cost:>8.0f}  {status}"
+        )
+    failed = sum(not r.ok for r in reports)
+    lines.append(f"\n{len(reports) - failed}/{len(reports)} shapes within budget")
+    return "\n".join(lines)
@@ -0,0 +1,48 @@
+"""
+Rate limiting that fails open.
+
+fastapi-limiter keeps its counters in Redis, behind the same circuit breaker
+as the cache. When Redis is down or the breaker is open the check cannot run;
+the request is let through unlimited rather than failed with a 500, the same
+way cache errors fall back to Postgres.
+"""
+from fastapi_limiter import FastAPILimiter
+from fastapi_limiter.depends import RateLimiter
+from redis.exceptions import RedisError
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.circuit_breaker import AVAILABILITY_ERRORS
+from app.middleware import logger
+
+REDIS_ERRORS = (RedisError,) + AVAILABILITY_ERRORS
+
+
+async def init_rate_limiter(redis) -> bool:
+    """
+    FastAPILimiter.init that tolerates Redis being down at startup.
+
+    init() sets the client before loading its Lua script, so a failed load
+    only leaves lua_sha unset; FailOpenRateLimiter loads it on first use.
+    """
+    try:
+        await FastAPILimiter.init(redis)
+        return True
+    except REDIS_ERRORS as e:
+        logger.warning(f"[ratelimit] Redis unavailable at startup, limits apply once it is back: {str(e)}")
+        return False
+
+
+class FailOpenRateLimiter(RateLimiter):
+    """RateLimiter that lets the request through when Redis can't be reached."""
+
+    async def _check(self, key):
+        if FastAPILimiter.lua_sha is None:
+            FastAPILimiter.lua_sha = await FastAPILimiter.redis.script_load(FastAPILimiter.lua_script)
+        return await super()._check(key)
+
+    async def __call__(self, request: Request, response: Response):
+        try:
+            return await super().__call__(request, response)
+        except REDIS_ERRORS as e:
+            logger.warning(f"[ratelimit] Check skipped for {request.url.path}: {str(e)}")
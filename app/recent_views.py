@@ -0,0 +1,109 @@
+import asyncio
+import time
+from collections import defaultdict
+from contextlib import suppress
+
+from app.config.database import redis_client
+from app.config.settings import (
+    RECENT_VIEWS_BATCH_SIZE,
+    RECENT_VIEWS_FLUSH_INTERVAL,
+    RECENT_VIEWS_LIMIT,
+    RECENT_VIEWS_QUEUE_SIZE,
+)
+from app.middleware import logger
+
+
+def recent_views_key(user_id: str) -> str:
+    return f"recent_views:{user_id}"
+
+
+class RecentViewsWriter:
+    """
+    Fire-and-forget recorder for recently viewed notes.
+
+    Requests only enqueue (user_id, note_id, viewed_at); a background task
+    drains the queue every `flush_interval` seconds and writes the whole batch
+    in one pipeline: per user a ZADD keyed by view time plus a trim to `limit`.
+    Views are best-effort: a full queue or a failed flush drops them.
+    """
+
+    def __init__(
+        self,
+        limit: int = RECENT_VIEWS_LIMIT,
+        batch_size: int = RECENT_VIEWS_BATCH_SIZE,
+        flush_interval: float = RECENT_VIEWS_FLUSH_INTERVAL,
+        queue_size: int = RECENT_VIEWS_QUEUE_SIZE,
+    ):
+        self.limit = limit
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._task: asyncio.Task | None = None
+
+    def record(self, user_id: str, note_id: int) -> None:
+        try:
+            self.queue.put_nowait((user_id, note_id, time.time()))
+        except asyncio.QueueFull:
+            logger.warning(f"[recent] Queue full, dropping view note_id={note_id} user_id={user_id}")
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Stop the background task and flush whatever is still queued, including
+        the batch the task had already taken off the queue.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        while not self.queue.empty():
+            await self._flush(self._drain())
+
+    def _drain(self, first=None) -> list[tuple]:
+        batch = [first] if first else []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = []
+            try:
+                batch = [await self.queue.get()]
+                # Let views from concurrent requests accumulate into one batch
+                await asyncio.sleep(self.flush_interval)
+                batch = self._drain(batch[0])
+                await self._flush(batch)
+            except asyncio.CancelledError:
+                # Cancelled by stop(): the batch in hand is no longer in the
+                # queue, so write it here (ZADD is idempotent if it was half-sent)
+                await self._flush(batch)
+                raise
+
+    async def _flush(self, batch: list[tuple]) -> None:
+        if not batch:
+            return
+        views_by_user: dict[str, dict[int, float]] = defaultdict(dict)
+        for user_id, note_id, viewed_at in batch:
+            views_by_user[user_id][note_id] = viewed_at
+
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            for user_id, views in views_by_user.items():
+                key = recent_views_key(user_id)
+                pipe.zadd(key, views)
+                pipe.zremrangebyrank(key, 0, -(self.limit + 1))
+            await pipe.execute()
+            logger.debug(f"[recent] Flushed {len(batch)} views for {len(views_by_user)} users")
+        except Exception as e:
+            logger.warning(f"[recent] Failed to flush {len(batch)} views: {str(e)}")
+
+
+recent_views_writer = RecentViewsWriter()
@@ -1,20 +1,34 @@
-from fastapi import APIRouter, Depends, status, Query, HTTPException
-from typing import Optional, List
+from fastapi import APIRouter, Depends, status, Query, HTTPException, Request, Response
+from typing import Optional, List, Union, Literal
 from uuid import UUID
-from app.config.database import SessionDep
+from app.config.database import SessionDep, ListSessionDep
 from app.models import  Notes
-from app.validators import NotesValidator, NotesResponse
+from app.validators import (
+    NotesValidator,
+    NotesResponse,
+    NotesProjection,
+    NotesBatchResponse,
+    FacetsResponse,
+    AutocompleteResponse,
+    PROJECTABLE_FIELDS,
+)
 from app.service import NoteService
-from fastapi_limiter.depends import RateLimiter
+from app.compression import preferred_encoding
+from app.config.settings import NOTES_BATCH_MAX_IDS
+from app.rate_limit import FailOpenRateLimiter
+from app.concurrency import db_concurrency_limit
 
 router = APIRouter()
 
+# Adaptive in-flight cap for endpoints that always hit Postgres
+DBLimit = Depends(db_concurrency_limit, scope="function")
+
 
 @router.post(
     '/',
     status_code=status.HTTP_201_CREATED,
     response_model=NotesResponse,
-    dependencies=[Depends(RateLimiter(100, seconds=600))],
+    dependencies=[Depends(FailOpenRateLimiter(100, seconds=600)), DBLimit],
     description=
     """creates notes
 
@@ -35,6 +49,52 @@ async def create_notes(data: NotesValidator, session: SessionDep):
         return NotesResponse.model_validate(note)
     raise HTTPException(status_code=400, detail="Note already exists")
 
+@router.get(
+    "/facets",
+    status_code=status.HTTP_200_OK,
+    response_model=FacetsResponse,
+    dependencies=[Depends(FailOpenRateLimiter(100, seconds=600))],
+    summary="Get tag and flag counts of live notes",
+    description="""
+        Return how many live (not soft-deleted) notes carry each tag,
+        and how many are public / pinned.
+
+        - Counts are maintained incrementally in Redis on every write,
+          so this is O(number of tags) rather than O(notes).
+        - Run `python -m app.cli rebuild-facets` to repair drift.
+        """
+)
+async def get_facets(session: SessionDep):
+    service = NoteService(session)
+    return await service.get_facets()
+
+
+@router.get(
+    "/autocomplete",
+    status_code=status.HTTP_200_OK,
+    response_model=AutocompleteResponse,
+    response_model_exclude_none=True,
+    dependencies=[Depends(FailOpenRateLimiter(1000, seconds=600))],
+    summary="Autocomplete note titles and tags",
+    description="""
+        Case-insensitive prefix suggestions for titles of live notes and for tags.
+
+        - Served from Redis sorted sets with ZRANGEBYLEX; no database query.
+        - `kind` limits the lookup to `title` or `tag` (both by default).
+        - Run `python -m app.cli rebuild-autocomplete` to rebuild the index.
+        """
+)
+async def autocomplete_notes(
+    session: SessionDep,
+    q: str = Query(..., min_length=1, max_length=100, description="Prefix typed so far"),
+    kind: Optional[Literal["title", "tag"]] = None,
+    limit: int = Query(10, ge=1, le=50),
+):
+    service = NoteService(session)
+    kinds = (kind,) if kind else ("title", "tag")
+    return await service.suggest(q, limit=limit, kinds=kinds)
+
+
 @router.get("/recent", 
             status_code=status.HTTP_200_OK,
             summary="Get recently viewed notes",
@@ -42,7 +102,7 @@ async def create_notes(data: NotesValidator, session: SessionDep):
         Return the list of recently viewed notes for a given user.
 
         - The list is **ordered by most recent first**.  
-        - The number of notes tracked in Redis is limited (default: 10).  
+        - The number of notes tracked in Redis is limited (`RECENT_VIEWS_LIMIT`, default: 10).  
         - The `user_id` parameter is required to identify which user's history to return.  
         - Notes that have been deleted (soft delete) are automatically excluded.
         """
@@ -63,11 +123,47 @@ async def get_recent_notes(
 
 
 
+@router.get(
+    '/batch',
+    status_code=status.HTTP_200_OK,
+    response_model=NotesBatchResponse,
+    dependencies=[Depends(FailOpenRateLimiter(100, seconds=600)), DBLimit],
+    summary="Get many notes by ID",
+    description=f"""
+        Fetch up to {NOTES_BATCH_MAX_IDS} notes in one request,
+        e.g. `?ids=3&ids=1&ids=7` or `?ids=3,1,7`.
+
+        - Notes come back in the requested order (duplicate IDs collapsed).
+        - Cache hits are served with one Redis MGET, misses with one SQL query.
+        - Unknown and soft-deleted IDs are listed in `missing`.
+        """
+)
+async def get_notes_batch(
+    session: SessionDep,
+    ids: List[str] = Query(..., description="Note IDs, repeated or comma-separated"),
+):
+    try:
+        note_ids = [int(value) for raw in ids for value in raw.split(",") if value.strip()]
+    except ValueError:
+        raise HTTPException(status_code=422, detail="ids must be integers")
+    if not note_ids:
+        raise HTTPException(status_code=422, detail="At least one id is required")
+    if len(set(note_ids)) > NOTES_BATCH_MAX_IDS:
+        raise HTTPException(status_code=422, detail=f"At most {NOTES_BATCH_MAX_IDS} ids per request")
+
+    note_session = NoteService(session)
+    notes, missing = await note_session.get_notes_by_ids(note_ids)
+    return NotesBatchResponse(
+        notes=[NotesResponse.model_validate(note) for note in notes],
+        missing=missing,
+    )
+
+
 @router.get(
     '/{note_id}',
     status_code=status.HTTP_200_OK,
     response_model=NotesResponse,
-    dependencies=[Depends(RateLimiter(100, seconds=600))],
+    dependencies=[Depends(FailOpenRateLimiter(100, seconds=600))],
     description= 
     """
     Get a note by ID, excluding soft-deleted notes
@@ -84,6 +180,7 @@ async def get_recent_notes(
 
 async def get_note(
     note_id: int, 
+    request: Request,
     session: SessionDep, 
     user_id: str = Query(None, description=
                          """
@@ -95,19 +192,33 @@ async def get_note(
                          """)):
 
     note_session = NoteService(session)
-    note = await note_session.get_note_by_id(note_id, user_id)
+
+    # Cache hit with a pre-compressed body: send it as-is, no serialisation or compression
+    encoding = preferred_encoding(request.headers.get("accept-encoding"))
+    if encoding:
+        body = await note_session.get_compressed_note(note_id, encoding)
+        if body:
+            if user_id:
+                note_session.add_to_recently_viewed(user_id=user_id, note_id=note_id)
+            return Response(
+                content=body,
+                media_type="application/json",
+                headers={"Content-Encoding": encoding, "Vary": "Accept-Encoding"},
+            )
+
+    note = await note_session.get_note_by_id(note_id)
     if not note:
         raise HTTPException(status_code=404, detail="Note not found")
      # Track recently viewed only if user_id provided
     if user_id:
-        await note_session.add_to_recently_viewed(user_id=user_id, note_id=note_id)
+        note_session.add_to_recently_viewed(user_id=user_id, note_id=note_id)
     return NotesResponse.model_validate(note)
 
 @router.put(
     '/{note_id}',
     status_code=status.HTTP_200_OK,
     response_model=NotesResponse,
-    dependencies=[Depends(RateLimiter(100, seconds=600))],
+    dependencies=[Depends(FailOpenRateLimiter(100, seconds=600)), DBLimit],
     description=  """Update a note by ID, excluding soft-deleted note"""
 
 )
@@ -124,8 +235,9 @@ async def update_note(note_id: int, notes: NotesValidator, session: SessionDep):
 @router.get(
     '/',
     status_code=status.HTTP_200_OK,
-    response_model=List[NotesResponse],
-    dependencies=[Depends(RateLimiter(100, seconds=600))],
+    response_model=Union[List[NotesResponse], List[NotesProjection]],
+    response_model_exclude_unset=True,
+    dependencies=[Depends(FailOpenRateLimiter(100, seconds=600)), DBLimit],
     description=
     """
         Get notes with optional filters
@@ -136,17 +248,34 @@ async def update_note(note_id: int, notes: NotesValidator, session: SessionDep):
             show_deleted: Include soft-deleted notes
             offset: Number of records to skip
             limit: Maximum number of records to return
+            fields: Only return these columns (plus `id`), e.g. `fields=title&fields=tag`
+                    or `fields=title,tag`
+            excerpt: Return the first N characters of `content` as `excerpt`
+                     (computed in Postgres, so the full body is never loaded)
+            count: Also return the total number of matching notes in the
+                   `X-Total-Count` header, with `X-Total-Count-Mode` set to
+                   `exact`, `cached` or `estimate`. `auto` counts exactly for
+                   selective filters and uses the planner estimate for broad ones.
     """
 )
 async def get_all_notes(
-    session: SessionDep,
+    session: ListSessionDep,
+    response: Response,
     offset: Optional[int] = None,
     limit: Optional[int] = None,
     tags: Optional[List[str]] = Query(None),
     is_public: Optional[bool] = None,
     is_pinned: Optional[bool] = None,
-    show_deleted: Optional[bool] = None
+    show_deleted: Optional[bool] = None,
+    fields: Optional[List[str]] = Query(None),
+    excerpt: Optional[int] = Query(None, ge=1, le=5000),
+    count: Optional[Literal["auto", "exact", "estimate"]] = None,
 ):
+    if fields:
+        fields = [name.strip() for value in fields for name in value.split(",") if name.strip()]
+        unknown = sorted(set(fields) - PROJECTABLE_FIELDS)
+        if unknown:
+            raise HTTPException(status_code=422, detail=f"Unknown fields: {', '.join(unknown)}")
     
     note_session = NoteService(session)
     notes = await note_session.get_all_notes(
@@ -155,15 +284,29 @@ async def get_all_notes(
         tags=tags,
         is_public=is_public,
         is_pinned=is_pinned,
-        show_deleted=show_deleted
+        show_deleted=show_deleted,
+        fields=fields,
+        excerpt=excerpt,
     )
+    if count:
+        total, mode = await note_session.count_notes(
+            tags=tags,
+            is_public=is_public,
+            is_pinned=is_pinned,
+            show_deleted=show_deleted,
+            mode=count,
+        )
+        response.headers["X-Total-Count"] = str(total)
+        response.headers["X-Total-Count-Mode"] = mode
+    if fields or excerpt:
+        return [NotesProjection(**note) for note in notes]
     return [NotesResponse.model_validate(note) for note in notes]
 
 
 @router.delete(
     '/softdelete/{note_id}',
     status_code=status.HTTP_200_OK,
-    dependencies=[Depends(RateLimiter(100, seconds=600))],
+    dependencies=[Depends(FailOpenRateLimiter(100, seconds=600)), DBLimit],
     description=
     """
         Soft delete a note by setting deleted_at timestamp
@@ -182,7 +325,7 @@ async def soft_delete_note(note_id: int, session: SessionDep):
 @router.delete(
     '/{note_id}',
     status_code=status.HTTP_200_OK,
-    dependencies=[Depends(RateLimiter(100, seconds=600))],
+    dependencies=[Depends(FailOpenRateLimiter(100, seconds=600)), DBLimit],
     description="""
     Permanently delete a note from database
   
@@ -200,7 +343,7 @@ async def hard_delete_note(note_id: int, session: SessionDep):
 @router.post(
     '/restore/{note_id}',
     status_code=status.HTTP_200_OK,
-    dependencies=[Depends(RateLimiter(100, seconds=600))]
+    dependencies=[Depends(FailOpenRateLimiter(100, seconds=600)), DBLimit]
 )
 async def restore_deleted_note(note_id: int, session: SessionDep):
     """
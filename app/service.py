@@ -1,25 +1,164 @@
-from .models import Notes, select, Optional
+from .models import Notes, NotesArchive, select, Optional
 from datetime import datetime, timezone
-from sqlalchemy import or_, cast
+from collections import Counter
+from typing import NamedTuple
+from sqlalchemy import or_, cast, func, distinct, text
 from sqlalchemy.dialects.postgresql import JSONB
-from app.config.database import redis_client, SessionDep
+from app.config.database import redis_client, redis_bytes_client, SessionDep, AsyncSessionLocal
+from app.config.settings import (
+    COMPRESSION_MIN_SIZE,
+    COUNT_CACHE_TTL,
+    COUNT_EXACT_THRESHOLD,
+    CREATE_GROUP_COMMIT,
+    CREATE_GROUP_COMMIT_MAX_BATCH,
+    CREATE_GROUP_COMMIT_WINDOW,
+    NOTE_LOADER_MAX_BATCH,
+    NOTE_LOADER_WINDOW,
+    RECENT_VIEWS_LIMIT,
+)
+from app.loader import BatchLoader, GroupCommitter
+from app import autocomplete
+from app.recent_views import recent_views_key, recent_views_writer
+from app.compression import CACHED_ENCODINGS, compress, supported_encodings
+from app.explain import Explain, plan_root
+from app.validators import NotesResponse
+from fastapi.responses import JSONResponse
+import hashlib
 import json
 import logging
 from app.middleware import logger
 # logger = logging.getLogger(__name__)
 
+
+class IndexSnapshot(NamedTuple):
+    id: int
+    title: str
+    tags: frozenset
+    is_public: bool
+    is_pinned: bool
+
+
+# Apply facet deltas only while the counters exist. After a Redis flush they
+# stay missing (instead of restarting from 0) until get_facets() rebuilds them.
+# KEYS: flags hash, tags hash. ARGV: number of flag deltas, then flag/delta
+# pairs, then tag/delta pairs. Returns the new tag counts, or nil if missing.
+FACET_DELTA_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then return false end
+local n = tonumber(ARGV[1])
+for i = 2, 2 * n, 2 do
+    redis.call('HINCRBY', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+local counts = {}
+for i = 2 * n + 2, #ARGV, 2 do
+    counts[#counts + 1] = redis.call('HINCRBY', KEYS[2], ARGV[i], ARGV[i + 1])
+end
+return counts
+"""
+
+
 class NoteService:
     CACHE_TTL = 1800  
+    FACET_TAGS_KEY = "facets:tags"
+    FACET_FLAGS_KEY = "facets:flags"
+    COUNT_KEY_PREFIX = "count:"
     def __init__(self, session: SessionDep):
         self.db = session
+
+    # Statement builders. Every query shape NoteService emits is built here so
+    # the query-plan harness (app/query_plans.py) explains exactly what runs.
+
+    @staticmethod
+    def duplicate_title_statement(title: str):
+        return select(Notes).where(
+            Notes.title == title,
+            Notes.deleted_at.is_(None)
+            )
+
+    @staticmethod
+    def live_titles_statement(titles: list[str]):
+        return select(Notes.title).where(
+            Notes.title.in_(titles),
+            Notes.deleted_at.is_(None)
+        )
+
+    @staticmethod
+    def live_notes_by_ids_statement(note_ids: list[int]):
+        return select(Notes).where(
+            Notes.id.in_(note_ids),
+            Notes.deleted_at.is_(None)
+        )
+
+    @staticmethod
+    def list_filters(
+        is_public: Optional[bool] = None,
+        is_pinned: Optional[bool] = None,
+        tags: Optional[list[str]] = None,
+        show_deleted: bool = False,
+        ) -> list:
+        filters = []
+        if(tags):  #e.g [politics, art, music]
+
+            conditions = [
+                cast(Notes.tag, JSONB).contains([tag])  
+                for tag in tags
+            ]
+            filters.append(or_(*conditions))     
+                            
+        if(is_public  is not None):
+            filters.append(Notes.is_public == is_public)
+          
+        if(is_pinned  is not None):
+            filters.append(Notes.is_pinned == is_pinned)
+            
+        if(not show_deleted ):
+            filters.append(Notes.deleted_at.is_(None))
+        return filters
+
+    @staticmethod
+    def count_statement(
+        is_public: Optional[bool] = None,
+        is_pinned: Optional[bool] = None,
+        tags: Optional[list[str]] = None,
+        show_deleted: bool = False,
+        ):
+        return select(func.count()).select_from(Notes).where(
+            *NoteService.list_filters(is_public, is_pinned, tags, show_deleted)
+        )
+
+    @staticmethod
+    def list_statement(
+        offset: Optional[int] = None,
+        limit: Optional[int] = None,
+        is_public: Optional[bool] = None,
+        is_pinned: Optional[bool] = None,
+        tags: Optional[list[str]] = None,
+        show_deleted: bool = False,
+        fields: Optional[list[str]] = None,
+        excerpt: Optional[int] = None,
+        ):
+        if fields or excerpt:
+            # Projection: only the requested columns leave Postgres
+            columns = [Notes.id] + [getattr(Notes, name) for name in fields or [] if name != "id"]
+            if excerpt:
+                columns.append(func.left(Notes.content, excerpt).label("excerpt"))
+            statement = select(*columns)
+        else:
+            statement = select(Notes)
+        statement = statement.where(*NoteService.list_filters(is_public, is_pinned, tags, show_deleted))
+            
+        if offset is not None:
+            statement = statement.offset(offset)
+
+        if limit is not None:
+            statement = statement.limit(limit)
+        return statement
  
 
     async def create_note(self, note: Notes) -> Notes:
+        if CREATE_GROUP_COMMIT:
+            return await self._create_note_grouped(note)
         try:
-            stmt =  select(Notes).where(
-                Notes.title == note.title,
-                Notes.deleted_at.is_(None)
-                )
+            stmt = self.duplicate_title_statement(note.title)
             result = await self.db.execute(stmt)
             note_exists = result.scalar()
 
@@ -31,65 +170,126 @@ class NoteService:
             self.db.add(note)
             await self.db.commit()
             await self.db.refresh(note)
+            await self._sync_indexes(None, self._index_snapshot(note))
             
             logger.info(f"Note created successfully: id={note.id}, title='{note.title}'")
             return note
         except Exception as e:
-            self.db.rollback()
+            await self.db.rollback()
             logger.error(f"Error creating note: {str(e)}", exc_info=True)
             raise
-        
-    async def get_note_by_id(self,note_id: int,user_id: str | None = None)-> Notes:
+
+    async def _create_note_grouped(self, note: Notes) -> Notes | None:
+        """create_note via the per-worker group committer (CREATE_GROUP_COMMIT=1)."""
         try:
-            # Check Redis cache first
-            cache_key = f"note:{note_id}"
-            
-            try:
-                cached = await redis_client.get(cache_key)
-                if cached:
-                    logger.debug(f"Cache hit for note {note_id}")
-                    # Parse the cached JSON and convert back to Notes object
-                    note_data = json.loads(cached)
-                    return Notes(**note_data)
-            except Exception as cache_error:
-                logger.warning(f"Redis cache error for note {note_id}: {str(cache_error)}")
-                # Continue to database if cache fails
-            
-            # Query database
-            stmt = select(Notes).where(
-                Notes.id == note_id,
-                Notes.deleted_at.is_(None)
+            created = await note_committer.submit(note)
+        except Exception as e:
+            logger.error(f"Error creating note: {str(e)}", exc_info=True)
+            raise
+        if created is None:
+            logger.warning(
+                f"Note creation failed: Note with title because it exists  '{note.title}' "
             )
-            result = await self.db.execute(stmt)
-            note = result.scalar()
-            if not note:
-                logger.info(f"Note not found: id={note_id}")
-                return None
-            #using user_id to allow recently viewed 
-            if user_id:
-               await self.add_to_recently_viewed(user_id, note_id)
+            return None
+        await self._sync_indexes(None, self._index_snapshot(created))
+        logger.info(f"Note created successfully: id={created.id}, title='{created.title}'")
+        return created
+
+    @classmethod
+    async def create_notes_batch(cls, notes: list[Notes]) -> list[Notes | None | Exception]:
+        """
+        Group-commit many creates: one duplicate-title lookup, one multi-row
+        INSERT ... RETURNING and one commit. Notes whose title is already live,
+        or repeats an earlier title in the same batch, resolve to None.
+        If the batch fails, each note is retried in its own transaction so a
+        bad row only fails its own caller.
+        """
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(cls.live_titles_statement(list({n.title for n in notes})))
+            taken = set(result.scalars().all())
+            results = []
+            for note in notes:
+                if note.title in taken:
+                    results.append(None)
+                else:
+                    taken.add(note.title)
+                    results.append(note)
+            accepted = [note for note in results if note is not None]
+            if not accepted:
+                return results
 
-            # Store in Redis cache
             try:
-                # Convert SQLModel to dict for JSON serialization
-                note_dict = note.model_dump(mode='json')
-                await redis_client.set(
-                    cache_key,
-                    json.dumps(note_dict),
-                    ex=self.CACHE_TTL
+                session.add_all(accepted)
+                await session.commit()
+                logger.info(f"[group-commit] Created {len(accepted)}/{len(notes)} notes in one transaction")
+                return results
+            except Exception as e:
+                await session.rollback()
+                logger.warning(
+                    f"[group-commit] Batch insert of {len(accepted)} notes failed, "
+                    f"retrying one by one: {str(e)}"
                 )
-                logger.debug(f"Cached note {note_id} in Redis")
-            except Exception as cache_error:
-                logger.warning(f"Failed to cache note {note_id}: {str(cache_error)}")
-                # Don't fail the request if caching fails
-            
-            logger.info(f"Note retrieved from database: id={note_id}")
+
+        for index, note in enumerate(results):
+            if note is None:
+                continue
+            note.id = None
+            try:
+                async with AsyncSessionLocal() as session:
+                    session.add(note)
+                    await session.commit()
+            except Exception as e:
+                results[index] = e
+        return results
+        
+    async def get_note_by_id(self,note_id: int)-> Notes:
+        """
+        Fetch a live note through the per-worker NoteLoader: concurrent lookups
+        are coalesced into one Redis MGET and one `id IN (...)` query.
+        """
+        try:
+            note = await note_loader.load(note_id)
+            if not note:
+                logger.info(f"Note not found: id={note_id}")
+                return None
             return note
             
         except Exception as e:
             logger.error(f"Error retrieving note {note_id}: {str(e)}", exc_info=True)
             raise e
 
+    @classmethod
+    async def load_notes_batch(cls, note_ids: list[int]) -> dict[int, Notes]:
+        """
+        Resolve many live notes at once: cache hits from a single MGET, misses
+        from a single `id IN (...)` query that also refills the cache.
+        Runs in its own session because the batch serves several requests.
+        """
+        found = {}
+        try:
+            cached = await redis_client.mget([f"note:{nid}" for nid in note_ids])
+            for nid, raw in zip(note_ids, cached):
+                if raw:
+                    found[nid] = Notes(**json.loads(raw))
+        except Exception as cache_error:
+            logger.warning(f"Redis cache error for notes {note_ids}: {str(cache_error)}")
+            # Continue to database if cache fails
+
+        missing_ids = [nid for nid in note_ids if nid not in found]
+        if missing_ids:
+            async with AsyncSessionLocal() as session:
+                service = cls(session)
+                result = await session.execute(cls.live_notes_by_ids_statement(missing_ids))
+                db_notes = result.scalars().all()
+            await service._update_cache_many(db_notes)
+            found.update({note.id: note for note in db_notes})
+
+        logger.info(
+            f"Loaded {len(found)}/{len(note_ids)} notes "
+            f"({len(note_ids) - len(missing_ids)} from cache)"
+        )
+        return found
+
     async def get_all_notes(
         self,
         offset: int, 
@@ -98,42 +298,38 @@ class NoteService:
         is_pinned: Optional[bool] = None,
         tags: Optional[list[str]] = None,
         show_deleted: bool = False,
-        ) -> list[Notes]: 
+        fields: Optional[list[str]] = None,
+        excerpt: Optional[int] = None,
+        ) -> list[Notes] | list[dict]: 
+        """
+        List notes. With `fields` and/or `excerpt` only those columns (plus id)
+        are selected and plain dicts are returned instead of ORM objects.
+        """
        
         try:
-            statement = select(Notes)
-            if(tags):  #e.g [politics, art, music]
-
-                conditions = [
-                    cast(Notes.tag, JSONB).contains([tag])  
-                    for tag in tags
-                ]
-                statement = statement.where(or_(*conditions))     
-                                
-            if(is_public  is not None):
-                statement = statement.where(Notes.is_public == is_public)
-              
-            if(is_pinned  is not None):
-                statement = statement.where(Notes.is_pinned == is_pinned)
-                
-            if(not show_deleted ):
-                statement = statement.where(Notes.deleted_at.is_(None))
-                
-            if offset is not None:
-                statement = statement.offset(offset)
-
-            if limit is not None:
-                statement = statement.limit(limit)
-            
+            statement = self.list_statement(
+                offset=offset,
+                limit=limit,
+                is_public=is_public,
+                is_pinned=is_pinned,
+                tags=tags,
+                show_deleted=show_deleted,
+                fields=fields,
+                excerpt=excerpt,
+            )
             result = await self.db.execute(statement)
 
 
-            notes = result.scalars().all()
+            if fields or excerpt:
+                notes = [dict(row) for row in result.mappings().all()]
+            else:
+                notes = result.scalars().all()
 
             logger.info(
                 f"Retrieved {len(notes)} notes with filters: "
                 f" is_public={is_public}, tags={tags}, "
-                f"show_deleted={show_deleted}, offset={offset}, limit={limit}"
+                f"show_deleted={show_deleted}, offset={offset}, limit={limit}, "
+                f"fields={fields}, excerpt={excerpt}"
             )
             
             return notes
@@ -143,6 +339,68 @@ class NoteService:
 
 
 
+    @classmethod
+    def _count_cache_key(cls, is_public, is_pinned, tags, show_deleted) -> str:
+        filters = json.dumps(
+            [is_public, is_pinned, sorted(set(tags or [])), bool(show_deleted)]
+        )
+        return cls.COUNT_KEY_PREFIX + hashlib.sha1(filters.encode()).hexdigest()
+
+    async def _estimate_count(self, filters: list) -> int:
+        """Planner row estimate; pg_class.reltuples when there is no filter at all."""
+        if not filters:
+            reltuples = (await self.db.execute(
+                text("SELECT reltuples FROM pg_class WHERE oid = CAST(:table AS regclass)"),
+                {"table": Notes.__tablename__},
+            )).scalar()
+            # -1 means the table has never been analyzed
+            if reltuples is not None and reltuples >= 0:
+                return int(reltuples)
+        result = await self.db.execute(Explain(select(Notes.id).where(*filters)))
+        return int(plan_root(result.scalar())["Plan Rows"])
+
+    async def count_notes(
+        self,
+        is_public: Optional[bool] = None,
+        is_pinned: Optional[bool] = None,
+        tags: Optional[list[str]] = None,
+        show_deleted: bool = False,
+        mode: str = "auto",
+        ) -> tuple[int, str]:
+        """
+        Total for list pagination, returned with how it was obtained:
+        "exact" (COUNT(*)), "cached" (an exact count from the last
+        COUNT_CACHE_TTL seconds) or "estimate" (planner estimate).
+
+        mode="estimate" never counts; mode="exact" always does (or reuses a
+        cached count); mode="auto" counts exactly only when the planner expects
+        at most COUNT_EXACT_THRESHOLD rows, so selective filters get exact
+        totals and broad ones never scan the table.
+        """
+        filters = self.list_filters(is_public, is_pinned, tags, show_deleted)
+        cache_key = self._count_cache_key(is_public, is_pinned, tags, show_deleted)
+
+        if mode != "estimate":
+            try:
+                cached = await redis_client.get(cache_key)
+                if cached is not None:
+                    return int(cached), "cached"
+            except Exception as e:
+                logger.warning(f"[count] Cache read failed for {cache_key}: {str(e)}")
+
+        if mode != "exact":
+            estimate = await self._estimate_count(filters)
+            if mode == "estimate" or estimate > COUNT_EXACT_THRESHOLD:
+                logger.info(f"[count] Estimated {estimate} notes (tags={tags}, show_deleted={show_deleted})")
+                return estimate, "estimate"
+
+        total = (await self.db.execute(self.count_statement(is_public, is_pinned, tags, show_deleted))).scalar_one()
+        try:
+            await redis_client.set(cache_key, total, ex=COUNT_CACHE_TTL)
+        except Exception as e:
+            logger.warning(f"[count] Cache write failed for {cache_key}: {str(e)}")
+        return total, "exact"
+
     async def soft_delete_note(self,note_id: int ):
         try:
             note = await self.db.get(Notes, note_id)
@@ -154,37 +412,44 @@ class NoteService:
                 return True
             
             note.deleted_at = datetime.now()
+            snapshot = self._index_snapshot(note)
             self.db.add(note)
             await self.db.commit()
+            await self._sync_indexes(snapshot, None)
             
             # Invalidate cache
-            self._invalidate_cache(note_id)
+            await self._invalidate_cache(note_id)
             
             logger.info(f"Note soft deleted: id={note_id}, title='{note.title}'")
             return True    
 
         except Exception as e:
-            self.db.rollback()
+            await self.db.rollback()
             logger.error(f"Error soft deleting note {note_id}: {str(e)}", exc_info=True)
             raise e
         
 
     async def hard_delete_note(self,note_id:int):
         """
-        Permanently delete a note from database
+        Permanently delete a note from database (live, soft-deleted or archived)
         Use with caution!
         """
         try:
             note = await self.db.get(Notes, note_id)
+            if not note:
+                # Already archived: it is soft-deleted, so no cache or index entries remain
+                note = await self.db.get(NotesArchive, note_id)
             if not note:
                 logger.warning(f"Hard delete failed: Note {note_id} not found")
                 return False
             title = note.title
-            self.db.delete(note)
+            snapshot = self._index_snapshot(note) if note.deleted_at is None else None
+            await self.db.delete(note)
             await self.db.commit()
+            await self._sync_indexes(snapshot, None)
             
             #invalidate cache
-            self._invalidate_cache(note_id)
+            await self._invalidate_cache(note_id)
             
             logger.warning(
                 f"Note permanently deleted: id={note_id}, title='{title}' "
@@ -192,7 +457,7 @@ class NoteService:
             )
             return True
         except Exception as e:
-            self.db.rollback()
+            await self.db.rollback()
             logger.error(f"Error hard deleting note {note_id}: {str(e)}", exc_info=True)
             raise e
         
@@ -205,13 +470,19 @@ class NoteService:
                 logger.warning(f"Update failed: Note {note_id} not found")
                 return None
             
+            before = self._index_snapshot(note) if note.deleted_at is None else None
             note_data=note_update.model_dump(exclude_unset=True)
             note.sqlmodel_update(note_data)
             self.db.add(note)
             await self.db.commit()
             await self.db.refresh(note)
-            # Update cache with new data
-            self._update_cache(note)
+            if before is not None:
+                await self._sync_indexes(before, self._index_snapshot(note))
+            # Update cache with new data; a soft-deleted note must not be served from it
+            if note.deleted_at is None:
+                await self._update_cache(note)
+            else:
+                await self._invalidate_cache(note_id)
             
             logger.info(
                 f"Note updated: id={note_id}, "
@@ -220,7 +491,7 @@ class NoteService:
                 
             return note
         except Exception as e:
-            self.db.rollback()
+            await self.db.rollback()
             logger.error(f"Failed to update note {note_id}: {str(e)}", exc_info=True)
             raise e
         
@@ -228,13 +499,16 @@ class NoteService:
         
     async def restore_note(self, note_id: int) -> bool:
         """
-        Restore a soft-deleted note
+        Restore a soft-deleted note, pulling it back from notes_archive
+        if the archival job has already moved it there
         """
         try:
             statement = select(Notes).where(Notes.id == note_id)
             
             note = await  self.db.execute(statement)
             note = note.scalar()
+            if not note:
+                note = await self._unarchive_note(note_id)
             if not note:
                 logger.warning(f"Restore failed: Note {note_id} not found")
                 return False
@@ -245,8 +519,9 @@ class NoteService:
             note.deleted_at = None
             self.db.add(note)
             await self.db.commit()
+            await self._sync_indexes(None, self._index_snapshot(note))
             # Update cache with restored note
-            self._update_cache(note)
+            await self._update_cache(note)
             
             logger.info(f"Note restored: id={note_id}, title={note.title}")
             await self.db.refresh(note)
@@ -254,75 +529,296 @@ class NoteService:
 
 
         except Exception as e:
-            self.db.rollback()
+            await self.db.rollback()
             logger.error(f"Error restoring note {note_id}: {str(e)}", exc_info=True)
             raise e 
         
-    
+
+    async def _unarchive_note(self, note_id: int) -> Notes | None:
+        """
+        Move an archived note back into notes (still soft-deleted).
+        The caller clears deleted_at and commits both changes together.
+        """
+        archived = await self.db.get(NotesArchive, note_id)
+        if not archived:
+            return None
+        note = Notes(**archived.model_dump(exclude={"archived_at"}))
+        await self.db.delete(archived)
+        # Flush the archive delete first so the id is never live in both tables.
+        await self.db.flush()
+        self.db.add(note)
+        logger.info(f"Note {note_id} pulled back from archive")
+        return note
+
+    @staticmethod
+    def _cache_keys(note_id: int) -> list[str]:
+        """
+        The JSON entry plus one pre-compressed response body per encoding.
+
+        Every encoding, not just supported_encodings(): a worker without brotli
+        must still invalidate the br bodies written by workers that have it.
+        """
+        return [f"note:{note_id}"] + [f"note:{note_id}:{enc}" for enc in CACHED_ENCODINGS]
+
+    @staticmethod
+    def response_body(note: Notes) -> bytes:
+        """The exact bytes the GET endpoint would send for this note"""
+        return JSONResponse(NotesResponse.model_validate(note).model_dump(mode='json')).body
+
+    def _queue_cache_set(self, pipe, note: Notes) -> None:
+        """Add SETs for a note's cache entry and its compressed bodies to `pipe`"""
+        pipe.set(f"note:{note.id}", json.dumps(note.model_dump(mode='json')), ex=self.CACHE_TTL)
+        body = self.response_body(note)
+        for encoding in CACHED_ENCODINGS:
+            key = f"note:{note.id}:{encoding}"
+            if len(body) >= COMPRESSION_MIN_SIZE and encoding in supported_encodings():
+                pipe.set(key, compress(body, encoding), ex=self.CACHE_TTL)
+            else:
+                pipe.delete(key)
+
     async def _invalidate_cache(self, note_id: int) -> None:
-        """Delete note from Redis cache"""
+        """Delete note (and its compressed bodies) from Redis cache"""
         try:
-            cache_key = f"note:{note_id}"
-            redis_client.delete(cache_key)
+            await redis_bytes_client.delete(*self._cache_keys(note_id))
             logger.debug(f"Cache invalidated for note {note_id}")
         except Exception as e:
             logger.warning(f"Failed to invalidate cache for note {note_id}: {str(e)}")
     
     async def _update_cache(self, note: Notes) -> None:
-        """Update note in Redis cache"""
+        """Update note in Redis cache, together with its pre-compressed bodies"""
+        await self._update_cache_many([note])
+
+    async def _update_cache_many(self, notes: list[Notes]) -> None:
+        """Refill cache entries for several notes in one pipeline"""
+        if not notes:
+            return
         try:
-            cache_key = f"note:{note.id}"
-            note_dict = note.model_dump(mode='json')
-            redis_client.set(
-                cache_key,
-                json.dumps(note_dict),
-                ex=self.CACHE_TTL
-            )
-            logger.debug(f"Cache updated for note {note.id}")
+            pipe = redis_bytes_client.pipeline(transaction=False)
+            for note in notes:
+                self._queue_cache_set(pipe, note)
+            await pipe.execute()
+            logger.debug(f"Cache updated for notes {[n.id for n in notes]}")
         except Exception as e:
-            logger.warning(f"Failed to update cache for note {note.id}: {str(e)}")
-
-    
+            logger.warning(f"Failed to update cache for notes {[n.id for n in notes]}: {str(e)}")
 
-    async def add_to_recently_viewed(self, user_id: str, note_id: int):
+    async def get_compressed_note(self, note_id: int, encoding: str) -> bytes | None:
         """
-        Add the viewed note to a Redis list for this user.
-        Keeps only the last 10 viewed notes.
+        Pre-compressed response body for a cached note, or None on a miss.
+        Lets the endpoint answer cache hits without re-serialising or compressing.
         """
-        key = f"recent_notes:{user_id}"
+        try:
+            return await redis_bytes_client.get(f"note:{note_id}:{encoding}")
+        except Exception as e:
+            logger.warning(f"Redis error reading compressed note {note_id}: {str(e)}")
+            return None
+
+    @staticmethod
+    def _index_snapshot(note: Notes) -> IndexSnapshot:
+        """Fields of a live note that the facet counters and autocomplete sets index"""
+        return IndexSnapshot(
+            note.id, note.title, frozenset(note.tag or []), bool(note.is_public), bool(note.is_pinned)
+        )
 
-        logger.info(f"[recent] Adding note_id={note_id} for user_id={user_id} (key={key})")
+    async def _sync_indexes(self, before: IndexSnapshot | None, after: IndexSnapshot | None) -> None:
+        """
+        Apply the difference between two snapshots to the facet counters and
+        the autocomplete sets in one pipeline.
+        `None` means the note is not live on that side (created, deleted or restored).
+        """
+        tag_delta = Counter()
+        flag_delta = Counter()
+        for snapshot, sign in ((before, -1), (after, 1)):
+            if snapshot is None:
+                continue
+            for tag in snapshot.tags:
+                tag_delta[tag] += sign
+            flag_delta["total"] += sign
+            flag_delta["is_public"] += sign * snapshot.is_public
+            flag_delta["is_pinned"] += sign * snapshot.is_pinned
+
+        tag_delta = {k: v for k, v in tag_delta.items() if v}
+        flag_delta = {k: v for k, v in flag_delta.items() if v}
+        old_title = autocomplete.title_member(before.id, before.title) if before else None
+        new_title = autocomplete.title_member(after.id, after.title) if after else None
+        if not tag_delta and not flag_delta and old_title == new_title:
+            return
 
         try:
-            removed = await redis_client.lrem(key, 0, note_id)
-            logger.debug(f"[recent] Removed {removed} duplicates for note_id={note_id}")
+            pipe = redis_client.pipeline(transaction=True)
+            if tag_delta or flag_delta:
+                args = [len(flag_delta)]
+                for flag, delta in flag_delta.items():
+                    args += [flag, delta]
+                for tag, delta in tag_delta.items():
+                    args += [tag, delta]
+                pipe.eval(FACET_DELTA_SCRIPT, 2, self.FACET_FLAGS_KEY, self.FACET_TAGS_KEY, *args)
+            for tag, delta in tag_delta.items():
+                if delta > 0:
+                    pipe.zadd(autocomplete.TAGS_KEY, {autocomplete.tag_member(tag): 0})
+            if old_title != new_title:
+                if old_title:
+                    pipe.zrem(autocomplete.TITLES_KEY, old_title)
+                if new_title:
+                    pipe.zadd(autocomplete.TITLES_KEY, {new_title: 0})
+            results = await pipe.execute()
+            tag_counts = results[0] if tag_delta or flag_delta else []
+            if tag_counts is None:
+                # Without counters there is no telling which tags lost their last
+                # live note; rebuild_facets (run by get_facets) also resets ac:tags.
+                logger.info("[facets] Counters missing in Redis, skipped deltas until the next rebuild")
+                return
+            logger.debug(f"[facets] Applied tags={tag_delta} flags={flag_delta}")
+
+            # Tags whose last live note just went away leave the autocomplete set
+            gone = [
+                autocomplete.tag_member(tag)
+                for tag, count in zip(tag_delta, tag_counts)
+                if int(count) <= 0
+            ]
+            if gone:
+                await redis_client.zrem(autocomplete.TAGS_KEY, *gone)
         except Exception as e:
-            logger.warning(f"[recent] Failed removing duplicate for key={key}: {str(e)}")
+            logger.warning(f"[facets] Failed to update facet counters / autocomplete: {str(e)}")
 
+    async def suggest(self, prefix: str, limit: int = 10, kinds: tuple[str, ...] = ("title", "tag")) -> dict:
+        """Typeahead suggestions for live note titles and tags (Redis only)"""
         try:
-            pushed = await redis_client.lpush(key, note_id)
-            logger.debug(f"[recent] LPUSH result (new list length) = {pushed}")
+            return await autocomplete.suggest(prefix, limit=limit, kinds=kinds)
+        except Exception as e:
+            logger.warning(f"[autocomplete] Lookup failed for prefix={prefix!r}: {str(e)}")
+            return {kind + "s": [] for kind in kinds}
+
+    async def rebuild_autocomplete(self) -> dict:
+        """Recreate the autocomplete sets from Postgres"""
+        return await autocomplete.rebuild_autocomplete(self.db)
+
+    async def _count_facets_from_db(self) -> dict:
+        """Compute facet counts for live notes directly from Postgres (O(notes))"""
+        tag_array = cast(Notes.tag, JSONB)
+        note_tags = (
+            select(
+                Notes.id,
+                func.jsonb_array_elements_text(tag_array).label("tag"),
+            )
+            .where(
+                Notes.deleted_at.is_(None),
+                func.jsonb_typeof(tag_array) == "array",
+            )
+            .distinct()
+            .subquery()
+        )
+        tag_stmt = select(note_tags.c.tag, func.count(distinct(note_tags.c.id))).group_by(note_tags.c.tag)
+        flag_stmt = select(
+            func.count(),
+            func.count().filter(Notes.is_public.is_(True)),
+            func.count().filter(Notes.is_pinned.is_(True)),
+        ).where(Notes.deleted_at.is_(None))
+
+        tag_rows = (await self.db.execute(tag_stmt)).all()
+        total, public, pinned = (await self.db.execute(flag_stmt)).one()
+        return {
+            "tags": {tag: count for tag, count in tag_rows},
+            "flags": {"total": total, "is_public": public, "is_pinned": pinned},
+        }
+
+    @staticmethod
+    def _format_facets(tags: dict, flags: dict) -> dict:
+        total = int(flags.get("total", 0))
+        public = int(flags.get("is_public", 0))
+        pinned = int(flags.get("is_pinned", 0))
+        return {
+            "total": total,
+            "tags": dict(sorted(
+                ((tag, int(count)) for tag, count in tags.items() if int(count) > 0),
+                key=lambda item: (-item[1], item[0]),
+            )),
+            "is_public": {"true": public, "false": total - public},
+            "is_pinned": {"true": pinned, "false": total - pinned},
+        }
+
+    async def rebuild_facets(self) -> dict:
+        """
+        Recount facets from Postgres and atomically replace the Redis hashes.
+        Use this to repair drift (e.g. after a Redis outage dropped increments).
+        The autocomplete tag set is replaced too: writes only drop a tag from it
+        when the counters say its last live note is gone, so while the counters
+        were missing it may have kept stale tags.
+        """
+        counts = await self._count_facets_from_db()
+        try:
+            pipe = redis_client.pipeline(transaction=True)
+            pipe.delete(self.FACET_TAGS_KEY, self.FACET_FLAGS_KEY, autocomplete.TAGS_KEY)
+            if counts["tags"]:
+                pipe.hset(self.FACET_TAGS_KEY, mapping=counts["tags"])
+                pipe.zadd(autocomplete.TAGS_KEY, {autocomplete.tag_member(tag): 0 for tag in counts["tags"]})
+            pipe.hset(self.FACET_FLAGS_KEY, mapping=counts["flags"])
+            await pipe.execute()
+            logger.info(
+                f"[facets] Rebuilt counters and autocomplete tags: {len(counts['tags'])} tags, "
+                f"{counts['flags']['total']} live notes"
+            )
         except Exception as e:
-            logger.error(f"[recent] Failed LPUSH for key={key}: {str(e)}")
+            logger.warning(f"[facets] Failed to store rebuilt counters: {str(e)}")
+        return self._format_facets(counts["tags"], counts["flags"])
 
+    async def get_facets(self) -> dict:
+        """
+        Return live-note counts per tag and for is_public / is_pinned.
+        Served from the Redis hashes; rebuilt from Postgres if they are missing
+        (writes never recreate them, see FACET_DELTA_SCRIPT).
+        """
         try:
-            await redis_client.ltrim(key, 0, 9)
-            logger.debug(f"[recent] Trimmed list to 10 items for key={key}")
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.hgetall(self.FACET_TAGS_KEY)
+            pipe.hgetall(self.FACET_FLAGS_KEY)
+            tags, flags = await pipe.execute()
         except Exception as e:
-            logger.error(f"[recent] Failed LTRIM for key={key}: {str(e)}")
+            logger.warning(f"[facets] Redis read failed, counting in database: {str(e)}")
+            counts = await self._count_facets_from_db()
+            return self._format_facets(counts["tags"], counts["flags"])
 
-        logger.info(f"[recent] Successfully updated recent notes for user={user_id}")
+        if flags:
+            return self._format_facets(tags, flags)
+        logger.info("[facets] Counters missing in Redis, rebuilding from database")
+        return await self.rebuild_facets()
+
+    def add_to_recently_viewed(self, user_id: str, note_id: int) -> None:
+        """
+        Record the view without waiting on Redis: the background writer
+        batches views into a per-user sorted set scored by view time,
+        capped at RECENT_VIEWS_LIMIT entries.
+        """
+        logger.debug(f"[recent] Queueing note_id={note_id} for user_id={user_id}")
+        recent_views_writer.record(user_id, note_id)
+
+    async def get_notes_by_ids(self, note_ids: list[int]) -> tuple[list[Notes], list[int]]:
+        """
+        Fetch many live notes in the requested order (duplicates collapsed).
+        Returns (notes, missing_ids); missing covers unknown and soft-deleted ids.
+        """
+        unique_ids = list(dict.fromkeys(note_ids))
+        if not unique_ids:
+            return [], []
+        found = await self.load_notes_batch(unique_ids)
+        notes = [found[nid] for nid in unique_ids if nid in found]
+        missing_ids = [nid for nid in unique_ids if nid not in found]
+        logger.info(f"Multi-get returned {len(notes)} notes, missing={missing_ids}")
+        return notes, missing_ids
 
     async def get_recently_viewed(self, user_id: str):
         """
         Returns the list of recently viewed notes (full objects, in order).
-        Attempts to fetch each note from Redis cache first, falling back to DB if missing.
+        Notes are loaded with get_notes_by_ids (cache first, DB for misses).
         """
-        key = f"recent_notes:{user_id}"
+        key = recent_views_key(user_id)
         logger.info(f"[recent] Fetching recently viewed notes for user_id={user_id} (key={key})")
 
-        note_ids = await redis_client.lrange(key, 0, -1)
-        logger.debug(f"[recent] Raw Redis lrange output: {note_ids}")
+        try:
+            note_ids = await redis_client.zrevrange(key, 0, RECENT_VIEWS_LIMIT - 1)
+            logger.debug(f"[recent] Raw Redis zrevrange output: {note_ids}")
+        except Exception as e:
+            logger.warning(f"[recent] Failed reading key={key}: {str(e)}")
+            return []
 
         if not note_ids:
             logger.info(f"[recent] No recently viewed notes found for user {user_id}")
@@ -336,51 +832,28 @@ class NoteService:
             logger.error(f"[recent] Failed converting note IDs to int: {str(e)}")
             return []
 
-        notes = []
-        missing_ids = []
+        # One MGET for cache hits, one IN query for the rest; deleted notes drop out
+        try:
+            ordered_notes, missing_ids = await self.get_notes_by_ids(note_ids)
+        except Exception as e:
+            logger.error(f"[recent] Failed loading notes {note_ids}: {str(e)}")
+            return []
 
-        # Try fetching each note from cache
-        for nid in note_ids:
-            try:
-                cached = await redis_client.get(f"note:{nid}")
-                if cached:
-                    note_obj = Notes(**json.loads(cached))
-                    notes.append(note_obj)
-                    logger.debug(f"[recent] Cache hit for note_id={nid}")
-                else:
-                    missing_ids.append(nid)
-                    logger.debug(f"[recent] Cache miss for note_id={nid}")
-            except Exception as e:
-                logger.warning(f"[recent] Error fetching note:{nid} from cache: {str(e)}")
-                missing_ids.append(nid)
+        logger.info(f"[recent] Returning ordered notes list: {[n.id for n in ordered_notes]}")
 
-        # Fetch missing notes from DB in one query
-        if missing_ids:
-            try:
-                stmt = select(Notes).where(Notes.id.in_(missing_ids))
-                result = await self.db.execute(stmt)
-                db_notes = result.scalars().all()
-                logger.debug(f"[recent] Fetched {len(db_notes)} missing notes from DB: {[n.id for n in db_notes]}")
-
-                for n in db_notes:
-                    notes.append(n)
-                    # Update cache for next time
-                    try:
-                        await redis_client.set(
-                            f"note:{n.id}",
-                            json.dumps(n.model_dump(mode='json')),
-                            ex=self.CACHE_TTL
-                        )
-                        logger.debug(f"[recent] Cached note_id={n.id} in Redis")
-                    except Exception as e:
-                        logger.warning(f"[recent] Failed to cache note_id={n.id}: {str(e)}")
-            except Exception as e:
-                logger.error(f"[recent] SQL fetch failed for missing_ids={missing_ids}: {str(e)}")
+        return ordered_notes
 
-        # Reorder according to Redis order
-        notes_map = {n.id: n for n in notes}
-        ordered_notes = [notes_map[nid] for nid in note_ids if nid in notes_map]
 
-        logger.info(f"[recent] Returning ordered notes list: {[n.id for n in ordered_notes]}")
+# One loader per worker process; see BatchLoader for the coalescing rules.
+note_loader = BatchLoader(
+    NoteService.load_notes_batch,
+    window=NOTE_LOADER_WINDOW,
+    max_batch_size=NOTE_LOADER_MAX_BATCH,
+)
 
-        return ordered_notes
+# Only used when CREATE_GROUP_COMMIT=1; see GroupCommitter.
+note_committer = GroupCommitter(
+    NoteService.create_notes_batch,
+    window=CREATE_GROUP_COMMIT_WINDOW,
+    max_batch_size=CREATE_GROUP_COMMIT_MAX_BATCH,
+)
@@ -18,6 +18,30 @@ class NotesResponse(BaseModel):
     deleted_at: Optional[datetime] = None
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class NotesProjection(BaseModel):
+    """Slim list item for `fields=` / `excerpt=` requests; only selected keys are sent."""
+    id: int
+    title: Optional[str] = None
+    content: Optional[str] = None
+    excerpt: Optional[str] = None
+    tag: Optional[List[str]] = None
+    is_public: Optional[bool] = None
+    is_pinned: Optional[bool] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    deleted_at: Optional[datetime] = None
+
+
+PROJECTABLE_FIELDS = set(NotesResponse.model_fields)
+
+
+class NotesBatchResponse(BaseModel):
+    notes: List[NotesResponse]
+    missing: List[int]
+
+
 class NotesValidator(BaseModel):    
     title: str  = Field(
         min_length=1,
@@ -51,4 +75,25 @@ class NotesValidator(BaseModel):
                 raise ValueError("Each tag must be at most 30 characters long.")
         return v
   
-    
\ No newline at end of file
+    
+
+class FacetCounts(BaseModel):
+    true: int
+    false: int
+
+
+class FacetsResponse(BaseModel):
+    total: int
+    tags: dict[str, int]
+    is_public: FacetCounts
+    is_pinned: FacetCounts
+
+
+class TitleSuggestion(BaseModel):
+    id: int
+    title: str
+
+
+class AutocompleteResponse(BaseModel):
+    titles: Optional[List[TitleSuggestion]] = None
+    tags: Optional[List[str]] = None
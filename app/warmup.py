@@ -0,0 +1,150 @@
+"""
+Cache and connection warm-up, run from the app lifespan (the CLI warms the cache only).
+
+After a deploy or a Redis restart the note cache is cold and every connection
+is new. Warm-up preloads pinned, public and recently viewed notes into Redis
+in pipelined batches, opens the pool's connections up front and runs the
+common statements on each one so asyncpg has them prepared.
+"""
+import asyncio
+import time
+
+from sqlalchemy import or_
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config.database import AsyncSessionLocal, engine, redis_client
+from app.config.settings import DB_POOL_SIZE, WARMUP_BATCH_SIZE, WARMUP_MAX_NOTES
+from app.middleware import logger
+from app.models import Notes, select
+from app.recent_views import recent_views_key
+from app.service import NoteService
+
+# Read by the /ready endpoint
+warmup_state = {"ready": False, "started_at": None, "finished_at": None, "notes_cached": 0, "errors": []}
+
+
+def representative_statements() -> list:
+    """The statements every request path runs, in the shapes asyncpg will prepare."""
+    return [
+        NoteService.live_notes_by_ids_statement([0]),
+        NoteService.duplicate_title_statement(""),
+        NoteService.list_statement(offset=0, limit=20),
+        NoteService.list_statement(offset=0, limit=20, tags=["warmup"]),
+    ]
+
+
+async def warm_pool(db_engine: AsyncEngine = engine, connections: int = DB_POOL_SIZE) -> int:
+    """
+    Check out `connections` connections at once so the pool opens all of
+    them, and prepare the representative statements on each.
+    """
+    async def prime() -> None:
+        arrived = False
+        try:
+            async with db_engine.connect() as conn:
+                for statement in representative_statements():
+                    await conn.execute(statement)
+                # Hold the connection until every checkout has happened
+                barrier.arrive()
+                arrived = True
+                await barrier.wait()
+        finally:
+            if not arrived:
+                barrier.arrive()
+
+    barrier = _Barrier(connections)
+    await asyncio.gather(*(prime() for _ in range(connections)))
+    logger.info(f"[warmup] Opened and primed {connections} pooled connections")
+    return connections
+
+
+class _Barrier:
+    """Minimal asyncio barrier (asyncio.Barrier needs Python 3.11)."""
+
+    def __init__(self, parties: int):
+        self.remaining = parties
+        self.event = asyncio.Event()
+
+    def arrive(self) -> None:
+        self.remaining -= 1
+        if self.remaining <= 0:
+            self.event.set()
+
+    async def wait(self) -> None:
+        await self.event.wait()
+
+
+async def _recently_viewed_ids(limit: int) -> list[int]:
+    """Note ids from every user's recently-viewed set, via SCAN + one pipeline."""
+    keys = []
+    cursor = 0
+    while True:
+        cursor, batch = await redis_client.scan(cursor, match=recent_views_key("*"), count=500)
+        keys.extend(batch)
+        if cursor == 0 or len(keys) >= limit:
+            break
+    if not keys:
+        return []
+    pipe = redis_client.pipeline(transaction=False)
+    for key in keys:
+        pipe.zrange(key, 0, -1)
+    ids = {int(nid) for members in await pipe.execute() for nid in members}
+    return list(ids)[:limit]
+
+
+async def warm_note_cache(max_notes: int = WARMUP_MAX_NOTES, batch_size: int = WARMUP_BATCH_SIZE) -> int:
+    """Preload pinned, public and recently viewed notes into the note cache."""
+    cached = 0
+    async with AsyncSessionLocal() as session:
+        service = NoteService(session)
+
+        statement = (
+            select(Notes)
+            .where(Notes.deleted_at.is_(None), or_(Notes.is_pinned.is_(True), Notes.is_public.is_(True)))
+            .order_by(Notes.is_pinned.desc(), Notes.created_at.desc())
+            .limit(max_notes)
+            .execution_options(yield_per=batch_size)
+        )
+        result = await session.stream_scalars(statement)
+        async for batch in result.partitions():
+            await service._update_cache_many(batch)
+            cached += len(batch)
+
+        try:
+            recent_ids = await _recently_viewed_ids(max_notes)
+        except Exception as e:
+            logger.warning(f"[warmup] Could not read recently viewed sets: {str(e)}")
+            recent_ids = []
+        for start in range(0, len(recent_ids), batch_size):
+            chunk = recent_ids[start:start + batch_size]
+            notes = (await session.execute(NoteService.live_notes_by_ids_statement(chunk))).scalars().all()
+            await service._update_cache_many(notes)
+            cached += len(notes)
+
+    logger.info(f"[warmup] Cached {cached} notes ({len(recent_ids)} recently viewed ids)")
+    return cached
+
+
+WARMUP_STAGES = {"pool": warm_pool, "cache": warm_note_cache}
+
+
+async def run_warmup(stages: tuple[str, ...] = ("pool", "cache")) -> dict:
+    """
+    Run the named warm-up stages; failures are recorded but never block readiness.
+    Pool priming only helps the process that will serve requests, so the CLI
+    runs the cache stage alone.
+    """
+    warmup_state.update(ready=False, started_at=time.time(), finished_at=None, notes_cached=0, errors=[])
+    for name in stages:
+        try:
+            result = await WARMUP_STAGES[name]()
+            if name == "cache":
+                warmup_state["notes_cached"] = result
+        except Exception as e:
+            logger.error(f"[warmup] Stage '{name}' failed: {str(e)}", exc_info=True)
+            warmup_state["errors"].append(f"{name}: {str(e)}")
+    warmup_state.update(ready=True, finished_at=time.time())
+    logger.info(
+        f"[warmup] Finished in {warmup_state['finished_at'] - warmup_state['started_at']:.2f}s"
+    )
+    return warmup_state
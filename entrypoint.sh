@@ -4,8 +4,6 @@ set -e
 # Ensure alembic installed paths are visible
 export PATH="$PATH:/home/appuser/.local/bin"
 
-echo "Running Alembic migrations..."
-python -m alembic upgrade head
-
+# Runs migrations under a Postgres advisory lock, then the uvicorn workers
 echo "Starting API..."
-exec uvicorn main:app --host 0.0.0.0 --port 8000
+exec python -m app.launcher
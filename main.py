@@ -1,10 +1,17 @@
-from fastapi import FastAPI
-from contextlib import asynccontextmanager
+import asyncio
+from fastapi import FastAPI, Response, status
+from contextlib import asynccontextmanager, suppress
 from app.routers import notes
 from app.middleware import LoggingMiddleware
+from app.compression import CompressionMiddleware
+from app.profiling import ProfilingMiddleware
 from app.config.logging import setup_logger
-from app.config.database import  redis_client
-from fastapi_limiter import FastAPILimiter
+from app.config.database import  redis_client, redis_bytes_client, redis_breaker
+from app.config.settings import ARCHIVE_INTERVAL_SECONDS, COMPRESSION_MIN_SIZE, WARMUP_ENABLED
+from app.archival import run_periodic_archival
+from app.recent_views import recent_views_writer
+from app.warmup import run_warmup, warmup_state
+from app.rate_limit import init_rate_limiter
 
 
 @asynccontextmanager
@@ -14,17 +21,58 @@ async def lifespan(app: FastAPI):
     # Logging initialized once at startup
     setup_logger()  
     
-    # Initialize redis for rate limiting
-    await FastAPILimiter.init(redis_client)
-    print("✅ Rate limiter initialized")
+    # Initialize redis for rate limiting (fails open while Redis is down)
+    if await init_rate_limiter(redis_client):
+        print("✅ Rate limiter initialized")
+
+    # Preload hot notes and prime the DB pool; /ready reports 503 until done
+    warmup_task = None
+    if WARMUP_ENABLED:
+        warmup_task = asyncio.create_task(run_warmup())
+    else:
+        warmup_state["ready"] = True
+
+    # Batch recently-viewed writes off the request path
+    recent_views_writer.start()
+
+    # Move long soft-deleted notes out of the hot table
+    archival_task = None
+    if ARCHIVE_INTERVAL_SECONDS > 0:
+        archival_task = asyncio.create_task(run_periodic_archival(ARCHIVE_INTERVAL_SECONDS))
 
     yield
 
     print("Application shutdown...")
+    if warmup_task and not warmup_task.done():
+        warmup_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await warmup_task
+    if archival_task:
+        archival_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await archival_task
+    await recent_views_writer.stop()
     await redis_client.close()
+    await redis_bytes_client.close()
 
 
 app = FastAPI(lifespan=lifespan)
 
 app.include_router(notes.router, prefix="/api/v1/notes")
+app.add_middleware(CompressionMiddleware, minimum_size=COMPRESSION_MIN_SIZE)
 app.add_middleware(LoggingMiddleware)
+app.add_middleware(ProfilingMiddleware)
+
+
+@app.get("/health", tags=["health"])
+async def health():
+    """Liveness plus Redis circuit-breaker state and transition counters."""
+    return {"status": "ok", "redis_breaker": redis_breaker.stats()}
+
+
+@app.get("/ready", tags=["health"])
+async def ready(response: Response):
+    """Readiness: 200 once startup warm-up has finished, 503 before that."""
+    if not warmup_state["ready"]:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return warmup_state